@@ -14,15 +14,26 @@ PoC実装: AI技術活用型文書解析システム
 
 import re
 import json
+import functools
+import logging
+import threading
 import numpy as np
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Literal
 from dataclasses import dataclass
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import make_pipeline
+from sklearn.decomposition import TruncatedSVD
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.svm import SVC
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
+from threadpoolctl import threadpool_limits
+import hashlib
 import joblib
+from joblib import Memory, Parallel, delayed
+
+# ホットパスでの stdout 書き込みを避けるため、進捗はログレベルで制御する
+log = logging.getLogger(__name__)
 
 # 既存のDocumentNodeを仮想的にインポート（実際は既存実装を使用）
 try:
@@ -30,20 +41,211 @@ try:
     from semantic_parser.core.semantic_parser import SemanticDocumentParser, StructuredSentence
 except ImportError:
     # 開発環境での代替実装
-    print("既存実装をインポート中... 本番環境では実際のモジュールを使用")
+    log.warning("既存実装をインポート中... 本番環境では実際のモジュールを使用")
+
+# ONNX Runtime による推論高速化（任意依存。未インストール時は scikit-learn で推論）
+try:
+    import onnxruntime
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    _ONNX_AVAILABLE = True
+except ImportError:
+    _ONNX_AVAILABLE = False
+
+# モデル保存時の圧縮方式（lz4未導入時はzlib）
+try:
+    import lz4  # noqa: F401
+    _MODEL_COMPRESS = ('lz4', 3)
+except ImportError:
+    _MODEL_COMPRESS = ('zlib', 3)
+
+# 解析結果キャッシュのキー生成（xxhash未導入時は組み込みhashを使用）
+try:
+    import xxhash
+    
+    def _text_digest(text: str) -> int:
+        return xxhash.xxh3_64_intdigest(text.encode('utf-8'))
+    
+    def _new_training_hasher():
+        return xxhash.xxh3_64()
+except ImportError:
+    def _text_digest(text: str) -> int:
+        return hash(text)
+    
+    def _new_training_hasher():
+        # 組み込みhashはプロセスごとに変わるため、永続キャッシュには使用しない
+        return hashlib.blake2b(digest_size=8)
+
+
+def _count_lines(text: str) -> int:
+    """行数（len(text.split('\\n')) と同値、リストを生成しない）"""
+    return text.count('\n') + 1
+
+
+def _prefix_structure_type(stripped: str) -> Optional[str]:
+    """先頭文字による構造判定（見出し: 'section'、リスト: 'list_item'、該当なし: None）
+    
+    正規表現は先頭文字が候補に一致した場合のみ評価する。
+    
+    Args:
+        stripped: 前後の空白を除去済みのテキスト
+    """
+    c0 = stripped[:1]
+    if c0 == '#':
+        return 'section' if _HEADER_RE.match(stripped) else None
+    if c0 in ('-', '*', '+'):
+        return 'list_item' if stripped[1:2].isspace() else None
+    if c0.isdigit():
+        return 'list_item' if _OLIST_RE.match(stripped) else None
+    return None
+
+
+# 訓練（特徴量抽出・次元圧縮・分類器のfit）結果のディスクキャッシュの既定の保存先
+_DEFAULT_FIT_CACHE_DIR = '.cache/analyzer'
 
 
-@dataclass
+def _training_key(training_texts: List[str], labels: List[str]) -> str:
+    """訓練データ (テキスト, ラベル) の内容ハッシュ"""
+    hasher = _new_training_hasher()
+    for text, label in zip(training_texts, labels):
+        hasher.update(text.encode('utf-8'))
+        hasher.update(b'\x00')
+        hasher.update(label.encode('utf-8'))
+        hasher.update(b'\x01')
+    return hasher.hexdigest()
+
+
+def _fit_structure_model(training_key: str, model_signature: Tuple[bool, str],
+                         feature_extractor, reducer, structure_classifier,
+                         label_encoder, training_texts: List[str],
+                         labels: List[str]) -> Dict[str, Any]:
+    """構造分類モデルの訓練
+    
+    キャッシュキーは training_key と model_signature のみ（訓練データ本体と
+    未訓練の推定器はハッシュ対象から除外）。
+    """
+    # 特徴量抽出
+    sparse_features = feature_extractor.fit_transform(training_texts)
+    
+    # 次元圧縮（成分数は元の特徴数未満に制限）
+    reducer.n_components = min(_SVD_COMPONENTS, max(1, sparse_features.shape[1] - 1))
+    features = reducer.fit_transform(sparse_features).astype(np.float32)
+    
+    # ラベルエンコーディング
+    encoded_labels = label_encoder.fit_transform(labels)
+    
+    # 分類器の訓練
+    X_train, X_test, y_train, y_test = train_test_split(
+        features, encoded_labels, test_size=0.2, random_state=42
+    )
+    
+    # 勾配ブースティングは葉の最小標本数が訓練件数を上回ると分岐できないため、件数に合わせて制限
+    if isinstance(structure_classifier, HistGradientBoostingClassifier):
+        structure_classifier.min_samples_leaf = min(20, max(1, len(X_train) // 10))
+    
+    structure_classifier.fit(X_train, y_train)
+    
+    return {
+        'feature_extractor': feature_extractor,
+        'reducer': reducer,
+        'structure_classifier': structure_classifier,
+        'label_encoder': label_encoder,
+        'train_accuracy': structure_classifier.score(X_train, y_train),
+        'test_accuracy': structure_classifier.score(X_test, y_test),
+        'feature_count': sparse_features.shape[1],
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _fit_structure_model_cached(location: Optional[str]):
+    """保存先ごとのキャッシュ付き訓練関数（Memory は初回の訓練時に作成、None でキャッシュ無効）"""
+    memory = Memory(location=location, verbose=0)
+    return memory.cache(
+        _fit_structure_model,
+        ignore=['feature_extractor', 'reducer', 'structure_classifier',
+                'label_encoder', 'training_texts', 'labels']
+    )
+
+
+# 行単位のホットループで使用する正規表現（モジュール読み込み時に一度だけコンパイル）
+_HEADER_RE = re.compile(r'^#{1,6}\s+')
+_ULIST_RE = re.compile(r'^\s*[-*+]\s+')
+_OLIST_RE = re.compile(r'^\s*\d+\.\s+')
+_INDENT_RE = re.compile(r'^\s{2,}', re.MULTILINE)
+_HEADER_RE_M = re.compile(r'^#{1,6}\s+', re.MULTILINE)
+_ULIST_RE_M = re.compile(r'^\s*[-*+]\s+', re.MULTILINE)
+_OLIST_RE_M = re.compile(r'^\s*\d+\.\s+', re.MULTILINE)
+_SENT_SPLIT_RE = re.compile(r'[.!?]+')
+_HEADER_SUB_RE = re.compile(r'^#+\s*')
+_HEADER_LEVEL_RE = re.compile(r'^(#+)')
+_ULIST_SUB_RE = re.compile(r'^\s*[-*+]\s*')
+_OLIST_SUB_RE = re.compile(r'^\s*\d+\.\s*')
+# 境界行（空行・見出し・リストマーカー）の一括検出用。改行を跨がないよう [^\S\n] を使用
+_BOUNDARY_LINE_RE = re.compile(
+    r'^(?:#{1,6}[^\S\n]|[^\S\n]*(?:[-*+]|\d+\.)[^\S\n]|[^\S\n]*$)',
+    re.MULTILINE
+)
+
+# 句読点密度の算出対象となるASCIIバイト
+_PUNCT_BYTES = np.array([ord(c) for c in '.,!?;:'], dtype=np.uint8)
+
+# ハッシング特徴量で並列変換に切り替える最小バッチサイズと分割単位
+_PARALLEL_MIN_BATCH = 1024
+_PARALLEL_SLICE = 256
+
+# process_documents_parallel でスレッドへ割り当てる1スライスあたりの文書数
+_PROCESS_SLICE = 128
+
+# TF-IDF特徴量を圧縮するTruncatedSVDの成分数
+_SVD_COMPONENTS = 64
+
+# 解析結果キャッシュの最大エントリ数（超過時は古いものから破棄）
+_ANALYSIS_CACHE_SIZE = 65536
+
+
+# 意味的特徴量ベクトルの列順（_extract_semantic_features の出力に対応）
+FEATURE_NAMES = (
+    'text_length',
+    'word_count',
+    'sentence_count',
+    'line_count',
+    'has_markdown_header',
+    'has_list_marker',
+    'has_numbered_list',
+    'has_indentation',
+    'avg_word_length',
+    'uppercase_ratio',
+    'punctuation_density',
+)
+FEATURE_IDX = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+
+def semantic_features_as_dict(features: np.ndarray) -> Dict[str, float]:
+    """特徴量ベクトルを {特徴名: 値} に変換（シリアライズ時のみ使用）"""
+    return dict(zip(FEATURE_NAMES, features.tolist()))
+
+
+@dataclass(slots=True, frozen=True)
 class AIAnalysisResult:
     """AI解析結果"""
     confidence: float
     structure_type: str
-    semantic_features: Dict[str, float]
+    semantic_features: np.ndarray  # shape (len(FEATURE_NAMES),), float32
     suggested_boundaries: List[int]
     metadata: Dict[str, Any]
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """意味的特徴量を名前付きに展開した辞書表現"""
+        return {
+            'confidence': self.confidence,
+            'structure_type': self.structure_type,
+            'semantic_features': semantic_features_as_dict(self.semantic_features),
+            'suggested_boundaries': self.suggested_boundaries,
+            'metadata': self.metadata
+        }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class HybridProcessingConfig:
     """ハイブリッド処理設定"""
     confidence_threshold: float = 0.8
@@ -51,33 +253,76 @@ class HybridProcessingConfig:
     enable_boundary_detection: bool = True
     fallback_to_rules: bool = True
     min_text_length: int = 10
+    classifier_kind: Literal['rf', 'hgbt'] = 'rf'
+    fit_cache_dir: Optional[str] = _DEFAULT_FIT_CACHE_DIR
 
 
 class LightweightDocumentAnalyzer:
     """軽量AI文書解析エンジン
     
     特徴:
-    - TF-IDF + RandomForest による高速分類
+    - TF-IDF + TruncatedSVD + HistGradientBoosting / RandomForest による高速分類
     - SVM による境界検出
     - 意味的特徴量の抽出
     - 低メモリ・高速処理
     """
     
-    def __init__(self, model_path: Optional[str] = None):
-        self.feature_extractor = TfidfVectorizer(
-            max_features=5000,
-            ngram_range=(1, 3),
-            stop_words='english',
-            lowercase=True,
-            strip_accents='unicode'
-        )
+    def __init__(self, model_path: Optional[str] = None, use_hashing: bool = False,
+                 classifier_kind: Literal['rf', 'hgbt'] = 'rf',
+                 fit_cache_dir: Optional[str] = _DEFAULT_FIT_CACHE_DIR):
+        """初期化
         
-        self.structure_classifier = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=20,
-            random_state=42,
-            n_jobs=-1
-        )
+        Args:
+            model_path: 訓練済みモデルのパス
+            use_hashing: 語彙辞書を持たないHashingVectorizerを特徴量抽出に使用するか
+            classifier_kind: 構造分類器の種類 ('rf': RandomForest, 'hgbt': HistGradientBoosting)
+            fit_cache_dir: 訓練結果のディスクキャッシュの保存先（None でキャッシュしない）
+        """
+        self.use_hashing = use_hashing
+        self.fit_cache_dir = fit_cache_dir
+        # 日本語主体の入力では英語ストップワードが意味を持たないため、除去は行わない
+        if use_hashing:
+            # 語彙辞書の参照が不要で、変換がスレッドセーフなハッシング特徴量
+            self.feature_extractor = make_pipeline(
+                HashingVectorizer(
+                    n_features=2**18,
+                    ngram_range=(1, 3),
+                    stop_words=None,
+                    lowercase=True,
+                    strip_accents='unicode',
+                    alternate_sign=False,
+                    norm='l2'
+                ),
+                TfidfTransformer()
+            )
+        else:
+            self.feature_extractor = TfidfVectorizer(
+                max_features=5000,
+                ngram_range=(1, 3),
+                stop_words=None,
+                lowercase=True,
+                strip_accents='unicode'
+            )
+        
+        # 疎なTF-IDF行列を低次元の密行列（float32）へ射影
+        self.reducer = TruncatedSVD(n_components=_SVD_COMPONENTS, random_state=42)
+        
+        self.classifier_kind = classifier_kind
+        if classifier_kind == 'hgbt':
+            # 浅いヒストグラム勾配ブースティング（predictが分岐予測しやすく高速）
+            self.structure_classifier = HistGradientBoostingClassifier(
+                max_iter=200,
+                max_depth=6,
+                learning_rate=0.1,
+                random_state=42
+            )
+        else:
+            self.structure_classifier = RandomForestClassifier(
+                n_estimators=50,
+                max_depth=8,
+                random_state=42,
+                n_jobs=-1
+            )
         
         self.boundary_detector = SVC(
             kernel='rbf',
@@ -88,6 +333,15 @@ class LightweightDocumentAnalyzer:
         self.label_encoder = LabelEncoder()
         self.is_trained = False
         
+        # 訓練済み分類器をONNXへ変換したもの（利用可能な場合のみ）
+        self._onnx_model: Optional[bytes] = None
+        self._ort_session = None
+        
+        # 解析結果キャッシュ（キー: (モデル世代, テキストハッシュ)）
+        self._cache: Dict[Tuple[int, int], Tuple[AIAnalysisResult, float]] = {}
+        self._cache_lock = threading.Lock()
+        self._generation = 0
+        
         if model_path:
             self.load_model(model_path)
     
@@ -103,24 +357,23 @@ class LightweightDocumentAnalyzer:
         Returns:
             訓練結果メトリクス
         """
-        print("AI分析モデルの訓練を開始...")
+        log.info("AI分析モデルの訓練を開始...")
         
-        # 特徴量抽出
-        features = self.feature_extractor.fit_transform(training_texts)
-        
-        # ラベルエンコーディング
-        encoded_labels = self.label_encoder.fit_transform(labels)
-        
-        # 分類器の訓練
-        X_train, X_test, y_train, y_test = train_test_split(
-            features, encoded_labels, test_size=0.2, random_state=42
+        # 構造分類モデルの訓練（同一データ・同一設定ならディスクキャッシュから復元）
+        fitted = _fit_structure_model_cached(self.fit_cache_dir)(
+            _training_key(training_texts, labels),
+            (self.use_hashing, self.classifier_kind),
+            self.feature_extractor, self.reducer, self.structure_classifier,
+            self.label_encoder, training_texts, labels
         )
-        
-        self.structure_classifier.fit(X_train, y_train)
-        
-        # 精度評価
-        train_accuracy = self.structure_classifier.score(X_train, y_train)
-        test_accuracy = self.structure_classifier.score(X_test, y_test)
+        self.feature_extractor = fitted['feature_extractor']
+        self.reducer = fitted['reducer']
+        self.structure_classifier = fitted['structure_classifier']
+        self.label_encoder = fitted['label_encoder']
+        train_accuracy = fitted['train_accuracy']
+        test_accuracy = fitted['test_accuracy']
+        # 標本数が少ない場合は n_components より出力次元が小さくなるため実際の成分数を使用
+        self._export_onnx(self.reducer.components_.shape[0])
         
         # 境界検出器の訓練（簡略化）
         boundary_features = self._extract_boundary_features(training_texts, boundaries)
@@ -129,13 +382,15 @@ class LightweightDocumentAnalyzer:
             self.boundary_detector.fit(boundary_features, boundary_labels)
         
         self.is_trained = True
+        self._invalidate_cache()
         
-        print(f"訓練完了 - 訓練精度: {train_accuracy:.3f}, テスト精度: {test_accuracy:.3f}")
+        log.info("訓練完了 - 訓練精度: %.3f, テスト精度: %.3f", train_accuracy, test_accuracy)
         
         return {
             'train_accuracy': train_accuracy,
             'test_accuracy': test_accuracy,
-            'feature_count': features.shape[1]
+            'feature_count': fitted['feature_count'],
+            'reduced_feature_count': self.reducer.components_.shape[0]
         }
     
     def analyze(self, text: str) -> Tuple[AIAnalysisResult, float]:
@@ -147,22 +402,133 @@ class LightweightDocumentAnalyzer:
         Returns:
             (解析結果, 信頼度)
         """
+        return self.analyze_batch([text])[0]
+    
+    def analyze_batch(self, texts: List[str]) -> List[Tuple[AIAnalysisResult, float]]:
+        """複数テキストの構造解析（一括処理）
+        
+        TF-IDF変換と分類器の推論を全テキストに対して一度ずつ実行し、
+        文書ごとの固定コストを償却する。解析済みのテキストはキャッシュから返す。
+        
+        Args:
+            texts: 解析対象テキストのリスト
+            
+        Returns:
+            (解析結果, 信頼度) のリスト（入力順）
+        """
+        results: List[Optional[Tuple[AIAnalysisResult, float]]] = [None] * len(texts)
+        keys = [(self._generation, _text_digest(text)) for text in texts]
+        
+        # キャッシュに無いテキストのみを解析対象とする
+        miss_indices = []
+        for i, key in enumerate(keys):
+            cached = self._cache.get(key)
+            if cached is None:
+                miss_indices.append(i)
+            else:
+                results[i] = cached
+        
+        if miss_indices:
+            miss_texts = [texts[i] for i in miss_indices]
+            for i, analysis in zip(miss_indices, self._analyze_uncached(miss_texts)):
+                results[i] = analysis
+                self._store_cache(keys[i], analysis)
+        
+        return results
+    
+    def _analyze_uncached(self, texts: List[str]) -> List[Tuple[AIAnalysisResult, float]]:
+        """キャッシュを介さずに複数テキストを解析"""
         if not self.is_trained:
             # デモ用: 事前訓練済みの想定で基本的な解析
-            return self._basic_analysis(text)
+            return [self._basic_analysis(text) for text in texts]
         
         # 特徴量抽出
-        features = self.feature_extractor.transform([text])
+        features = self._transform(texts)
         
-        # 構造分類
-        predicted_prob = self.structure_classifier.predict_proba(features)[0]
-        predicted_label_idx = np.argmax(predicted_prob)
-        confidence = predicted_prob[predicted_label_idx]
+        # 構造分類（N×C の確率行列）
+        predicted_prob = self._predict_proba(features)
+        # 最大値と位置を行方向のリダクションで直接求める（インデックス配列による収集を避ける）
+        predicted_label_idx = predicted_prob.argmax(axis=1)
+        confidences = predicted_prob.max(axis=1)
         
-        structure_type = self.label_encoder.inverse_transform([predicted_label_idx])[0]
+        structure_types = self.label_encoder.inverse_transform(predicted_label_idx)
         
+        return [
+            self._build_analysis_result(text, confidence, structure_type)
+            for text, confidence, structure_type in zip(texts, confidences, structure_types)
+        ]
+    
+    def _store_cache(self, key: Tuple[int, int], analysis: Tuple[AIAnalysisResult, float]) -> None:
+        """解析結果をキャッシュへ登録（上限超過時は最古のエントリを破棄）"""
+        # 複数スレッドから analyze_batch が呼ばれても破棄と登録が競合しないようにする
+        with self._cache_lock:
+            if len(self._cache) >= _ANALYSIS_CACHE_SIZE:
+                del self._cache[next(iter(self._cache))]
+            self._cache[key] = analysis
+    
+    def _invalidate_cache(self) -> None:
+        """モデル更新時にキャッシュを無効化"""
+        self._generation += 1
+        self._cache.clear()
+    
+    def _transform(self, texts: List[str]) -> np.ndarray:
+        """テキストを圧縮済みの特徴量行列（float32）へ変換
+        
+        ハッシング特徴量は状態を持たないため、大きなバッチはスレッド並列で変換する。
+        """
+        if not self.use_hashing or len(texts) < _PARALLEL_MIN_BATCH:
+            return self._featurize(texts)
+        
+        slices = [texts[i:i + _PARALLEL_SLICE] for i in range(0, len(texts), _PARALLEL_SLICE)]
+        parts = Parallel(n_jobs=-1, prefer='threads')(
+            delayed(self._featurize)(part) for part in slices
+        )
+        return np.vstack(parts)
+    
+    def _featurize(self, texts: List[str]) -> np.ndarray:
+        """TF-IDF変換とSVD射影を適用"""
+        return self.reducer.transform(self.feature_extractor.transform(texts)).astype(np.float32)
+    
+    def _predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """構造分類の確率行列を取得（ONNXセッションがあれば優先）"""
+        if self._ort_session is not None:
+            return self._ort_session.run(None, {'X': features})[1]
+        return self.structure_classifier.predict_proba(features)
+    
+    def _export_onnx(self, n_features: int) -> None:
+        """訓練済み分類器をONNXへ変換し推論セッションを作成"""
+        self._onnx_model = None
+        self._ort_session = None
+        if not _ONNX_AVAILABLE:
+            return
+        try:
+            onx = convert_sklearn(
+                self.structure_classifier,
+                initial_types=[('X', FloatTensorType([None, n_features]))],
+                options={id(self.structure_classifier): {'zipmap': False}}
+            )
+            self._onnx_model = onx.SerializeToString()
+            self._create_ort_session()
+        except Exception as e:
+            # 変換に失敗した場合は scikit-learn での推論を継続
+            log.warning("ONNX変換エラー（scikit-learnで推論します）: %s", e)
+            self._onnx_model = None
+    
+    def _create_ort_session(self) -> None:
+        """保持しているONNXモデルから推論セッションを作成"""
+        if self._onnx_model is None or not _ONNX_AVAILABLE:
+            self._ort_session = None
+            return
+        self._ort_session = onnxruntime.InferenceSession(
+            self._onnx_model, providers=['CPUExecutionProvider']
+        )
+    
+    def _build_analysis_result(self, text: str, confidence: float,
+                               structure_type: str) -> Tuple[AIAnalysisResult, float]:
+        """分類結果から解析結果を組み立てる"""
         # 意味的特徴量抽出
-        semantic_features = self._extract_semantic_features(text)
+        n_lines = _count_lines(text)
+        semantic_features = self._extract_semantic_features(text, n_lines)
         
         # 境界検出
         suggested_boundaries = self._detect_boundaries(text) if hasattr(self, 'boundary_detector') else []
@@ -174,8 +540,8 @@ class LightweightDocumentAnalyzer:
             suggested_boundaries=suggested_boundaries,
             metadata={
                 'text_length': len(text),
-                'word_count': len(text.split()),
-                'line_count': len(text.split('\n'))
+                'word_count': int(semantic_features[FEATURE_IDX['word_count']]),
+                'line_count': n_lines
             }
         )
         
@@ -183,21 +549,24 @@ class LightweightDocumentAnalyzer:
     
     def _basic_analysis(self, text: str) -> Tuple[AIAnalysisResult, float]:
         """基本的な解析（訓練前のデモ用）"""
-        # ルールベースの基本判定
-        if re.match(r'^#{1,6}\s+', text.strip()):
+        # ルールベースの基本判定（先頭文字で分岐）
+        stripped = text.strip()
+        prefix_type = _prefix_structure_type(stripped)
+        if prefix_type == 'section':
             structure_type = 'section'
             confidence = 0.85
-        elif re.match(r'^\s*[-*+]\s+', text.strip()) or re.match(r'^\s*\d+\.\s+', text.strip()):
+        elif prefix_type == 'list_item':
             structure_type = 'list_item'
             confidence = 0.80
-        elif len(text.strip()) < 20:
+        elif len(stripped) < 20:
             structure_type = 'list_item'
             confidence = 0.60
         else:
             structure_type = 'paragraph'
             confidence = 0.70
         
-        semantic_features = self._extract_semantic_features(text)
+        n_lines = _count_lines(text)
+        semantic_features = self._extract_semantic_features(text, n_lines)
         
         result = AIAnalysisResult(
             confidence=confidence,
@@ -206,45 +575,55 @@ class LightweightDocumentAnalyzer:
             suggested_boundaries=[],
             metadata={
                 'text_length': len(text),
-                'word_count': len(text.split()),
-                'line_count': len(text.split('\n')),
+                'word_count': int(semantic_features[FEATURE_IDX['word_count']]),
+                'line_count': n_lines,
                 'analysis_mode': 'basic_rules'
             }
         )
         
         return result, confidence
     
-    def _extract_semantic_features(self, text: str) -> Dict[str, float]:
-        """意味的特徴量の抽出"""
-        features = {}
+    def _extract_semantic_features(self, text: str, n_lines: Optional[int] = None) -> np.ndarray:
+        """意味的特徴量の抽出
+        
+        Args:
+            text: 対象テキスト
+            n_lines: 計算済みの行数（省略時はここで数える）
+            
+        Returns:
+            FEATURE_NAMES の列順に並んだ float32 ベクトル
+        """
+        features = np.zeros(len(FEATURE_NAMES), dtype=np.float32)
+        words = text.split()
         
         # 基本統計
-        features['text_length'] = len(text)
-        features['word_count'] = len(text.split())
-        features['sentence_count'] = len(re.split(r'[.!?]+', text))
-        features['line_count'] = len(text.split('\n'))
+        features[FEATURE_IDX['text_length']] = len(text)
+        features[FEATURE_IDX['word_count']] = len(words)
+        features[FEATURE_IDX['sentence_count']] = len(_SENT_SPLIT_RE.split(text))
+        features[FEATURE_IDX['line_count']] = _count_lines(text) if n_lines is None else n_lines
         
         # 構造的特徴
-        features['has_markdown_header'] = 1.0 if re.search(r'^#{1,6}\s+', text, re.MULTILINE) else 0.0
-        features['has_list_marker'] = 1.0 if re.search(r'^\s*[-*+]\s+', text, re.MULTILINE) else 0.0
-        features['has_numbered_list'] = 1.0 if re.search(r'^\s*\d+\.\s+', text, re.MULTILINE) else 0.0
-        features['has_indentation'] = 1.0 if re.search(r'^\s{2,}', text, re.MULTILINE) else 0.0
+        features[FEATURE_IDX['has_markdown_header']] = 1.0 if _HEADER_RE_M.search(text) else 0.0
+        features[FEATURE_IDX['has_list_marker']] = 1.0 if _ULIST_RE_M.search(text) else 0.0
+        features[FEATURE_IDX['has_numbered_list']] = 1.0 if _OLIST_RE_M.search(text) else 0.0
+        features[FEATURE_IDX['has_indentation']] = 1.0 if _INDENT_RE.search(text) else 0.0
         
         # 内容的特徴
-        features['avg_word_length'] = np.mean([len(word) for word in text.split()]) if text.split() else 0.0
-        features['uppercase_ratio'] = sum(1 for c in text if c.isupper()) / len(text) if text else 0.0
-        features['punctuation_density'] = sum(1 for c in text if c in '.,!?;:') / len(text) if text else 0.0
+        features[FEATURE_IDX['avg_word_length']] = sum(map(len, words)) / len(words) if words else 0.0
+        if text:
+            # ASCII部分をバイト列として一度だけ走査し、大文字・句読点をベクトル演算で数える
+            buf = np.frombuffer(text.encode('ascii', errors='ignore'), dtype=np.uint8)
+            features[FEATURE_IDX['uppercase_ratio']] = np.count_nonzero((buf >= 65) & (buf <= 90)) / len(text)
+            features[FEATURE_IDX['punctuation_density']] = np.count_nonzero(np.isin(buf, _PUNCT_BYTES)) / len(text)
         
         return features
     
     def _extract_boundary_features(self, texts: List[str], boundaries: List[List[int]]) -> np.ndarray:
         """境界検出用特徴量の抽出"""
         # 実装簡略化: 基本的な特徴量のみ
-        features = []
-        for text in texts:
-            semantic_features = self._extract_semantic_features(text)
-            features.append(list(semantic_features.values()))
-        return np.array(features)
+        if not texts:
+            return np.empty((0, len(FEATURE_NAMES)), dtype=np.float32)
+        return np.vstack([self._extract_semantic_features(text) for text in texts])
     
     def _create_boundary_labels(self, boundaries: List[List[int]]) -> List[int]:
         """境界ラベルの作成"""
@@ -253,44 +632,60 @@ class LightweightDocumentAnalyzer:
     
     def _detect_boundaries(self, text: str) -> List[int]:
         """境界検出"""
-        # 基本的な境界検出ロジック
+        # 空行、見出し、リストマーカーで始まる行を一度の走査でまとめて検出
         boundaries = []
-        lines = text.split('\n')
-        
-        for i, line in enumerate(lines):
-            # 空行、見出し、リストマーカーを境界として検出
-            if (not line.strip() or 
-                re.match(r'^#{1,6}\s+', line) or 
-                re.match(r'^\s*[-*+]\s+', line) or
-                re.match(r'^\s*\d+\.\s+', line)):
-                boundaries.append(i)
+        line_index = 0
+        pos = 0
+        for match in _BOUNDARY_LINE_RE.finditer(text):
+            line_index += text.count('\n', pos, match.start())
+            pos = match.start()
+            boundaries.append(line_index)
         
         return boundaries
     
-    def save_model(self, path: str) -> None:
-        """モデルの保存"""
+    def save_model(self, path: str, compress: bool = True) -> None:
+        """モデルの保存
+        
+        Args:
+            path: 保存先パス
+            compress: 圧縮して保存するか（False の場合は load_model の mmap_mode で
+                配列をメモリマップで読み込める）
+        """
         model_data = {
             'feature_extractor': self.feature_extractor,
+            'reducer': self.reducer,
             'structure_classifier': self.structure_classifier,
             'boundary_detector': self.boundary_detector,
             'label_encoder': self.label_encoder,
-            'is_trained': self.is_trained
+            'is_trained': self.is_trained,
+            'onnx_model': self._onnx_model
         }
-        joblib.dump(model_data, path)
-        print(f"モデルを保存しました: {path}")
+        # pickle protocol 5 では NumPy 配列がアウトオブバンドバッファとして書き出される
+        joblib.dump(model_data, path, compress=_MODEL_COMPRESS if compress else 0, protocol=5)
+        log.info("モデルを保存しました: %s", path)
     
-    def load_model(self, path: str) -> None:
-        """モデルの読み込み"""
+    def load_model(self, path: str, mmap_mode: Optional[str] = None) -> None:
+        """モデルの読み込み
+        
+        Args:
+            path: モデルファイルのパス
+            mmap_mode: 配列をメモリマップで読み込む際のモード（'r' など）。
+                save_model(compress=False) で保存したモデルでのみ有効
+        """
         try:
-            model_data = joblib.load(path)
+            model_data = joblib.load(path, mmap_mode=mmap_mode)
             self.feature_extractor = model_data['feature_extractor']
+            self.reducer = model_data['reducer']
             self.structure_classifier = model_data['structure_classifier']
             self.boundary_detector = model_data['boundary_detector']
             self.label_encoder = model_data['label_encoder']
             self.is_trained = model_data['is_trained']
-            print(f"モデルを読み込みました: {path}")
+            self._onnx_model = model_data.get('onnx_model')
+            self._create_ort_session()
+            self._invalidate_cache()
+            log.info("モデルを読み込みました: %s", path)
         except Exception as e:
-            print(f"モデル読み込みエラー: {e}")
+            log.error("モデル読み込みエラー: %s", e)
 
 
 class HybridDocumentProcessor:
@@ -307,11 +702,14 @@ class HybridDocumentProcessor:
         self.rule_processor = SemanticDocumentParser() if 'SemanticDocumentParser' in globals() else None
         
         # 新しいAIシステム
-        self.ai_processor = LightweightDocumentAnalyzer()
+        self.ai_processor = LightweightDocumentAnalyzer(
+            classifier_kind=self.config.classifier_kind,
+            fit_cache_dir=self.config.fit_cache_dir
+        )
         
-        print("ハイブリッド文書処理システムを初期化しました")
-        print(f"- 信頼度閾値: {self.config.confidence_threshold}")
-        print(f"- ルールベースフォールバック: {'有効' if self.config.fallback_to_rules else '無効'}")
+        log.info("ハイブリッド文書処理システムを初期化しました")
+        log.info("- 信頼度閾値: %s", self.config.confidence_threshold)
+        log.info("- ルールベースフォールバック: %s", '有効' if self.config.fallback_to_rules else '無効')
     
     def process_document(self, text: str) -> DocumentNode:
         """文書の処理
@@ -322,33 +720,87 @@ class HybridDocumentProcessor:
         Returns:
             DocumentNode階層構造
         """
-        print(f"\n文書処理開始 (長さ: {len(text)} 文字)")
+        log.debug("文書処理開始 (長さ: %d 文字)", len(text))
         
         # AI解析を実行
         ai_result, confidence = self.ai_processor.analyze(text)
         
-        print(f"AI解析結果:")
-        print(f"- 構造タイプ: {ai_result.structure_type}")
-        print(f"- 信頼度: {confidence:.3f}")
-        print(f"- 意味的特徴数: {len(ai_result.semantic_features)}")
+        return self._dispatch_by_confidence(text, ai_result, confidence)
+    
+    def process_documents(self, texts: List[str]) -> List[DocumentNode]:
+        """複数文書の一括処理
+        
+        AI解析は analyze_batch で一度にまとめて実行し、
+        DocumentNodeの構築のみ文書ごとに行う。
+        
+        Args:
+            texts: 処理対象テキストのリスト
+            
+        Returns:
+            DocumentNodeのリスト（入力順）
+        """
+        analyses = self.ai_processor.analyze_batch(texts)
+        return [
+            self._dispatch_by_confidence(text, ai_result, confidence)
+            for text, (ai_result, confidence) in zip(texts, analyses)
+        ]
+    
+    def process_documents_parallel(self, texts: List[str], n_jobs: int = -1) -> List[DocumentNode]:
+        """複数文書の並列一括処理
+        
+        テキストを _PROCESS_SLICE 件ずつに分割し、AI解析をスレッド並列で実行する。
+        scikit-learn の推論は GIL を解放するため、スレッドでもコア数に応じて高速化する。
+        DocumentNodeの構築は呼び出し元スレッドで逐次行う。
+        
+        Args:
+            texts: 処理対象テキストのリスト
+            n_jobs: 並列スレッド数（-1 で全コア）
+            
+        Returns:
+            DocumentNodeのリスト（入力順）
+        """
+        slices = [texts[i:i + _PROCESS_SLICE] for i in range(0, len(texts), _PROCESS_SLICE)]
+        
+        # スレッド並列とBLAS内部の並列が重ならないよう、BLASは1スレッドに制限
+        with threadpool_limits(limits=1, user_api='blas'):
+            batches = Parallel(n_jobs=n_jobs, prefer='threads')(
+                delayed(self.ai_processor.analyze_batch)(s) for s in slices
+            )
+        
+        return [
+            self._dispatch_by_confidence(text, ai_result, confidence)
+            for text, (ai_result, confidence) in zip(texts, (a for batch in batches for a in batch))
+        ]
+    
+    def _dispatch_by_confidence(self, text: str, ai_result: AIAnalysisResult,
+                                confidence: float) -> DocumentNode:
+        """信頼度に応じて処理方式を選択"""
+        log.debug("AI解析結果: 構造タイプ=%s 信頼度=%.3f 意味的特徴数=%d",
+                  ai_result.structure_type, confidence, len(ai_result.semantic_features))
+        
+        # 行数は解析時に数えたものを以降の処理で使い回す
+        n_lines = ai_result.metadata['line_count']
         
         if confidence >= self.config.confidence_threshold:
             # 高信頼度: AI結果を使用
-            print("✓ 高信頼度 - AI解析結果を採用")
-            return self._build_document_from_ai_result(text, ai_result)
+            log.debug("✓ 高信頼度 - AI解析結果を採用")
+            return self._build_document_from_ai_result(text, ai_result, n_lines)
         
         elif self.config.fallback_to_rules and self.rule_processor:
             # 低信頼度: ルールベースにフォールバック
-            print("⚠ 低信頼度 - ルールベース処理にフォールバック")
-            return self._process_with_rules(text)
+            log.debug("⚠ 低信頼度 - ルールベース処理にフォールバック")
+            return self._process_with_rules(text, n_lines)
         
         else:
             # ハイブリッド処理: AI + ルールの組み合わせ
-            print("🔄 ハイブリッド処理 - AI + ルール組み合わせ")
-            return self._hybrid_processing(text, ai_result)
+            log.debug("🔄 ハイブリッド処理 - AI + ルール組み合わせ")
+            return self._hybrid_processing(text, ai_result, n_lines)
     
-    def _build_document_from_ai_result(self, text: str, ai_result: AIAnalysisResult) -> DocumentNode:
+    def _build_document_from_ai_result(self, text: str, ai_result: AIAnalysisResult,
+                                       n_lines: Optional[int] = None) -> DocumentNode:
         """AI解析結果からDocumentNodeを構築"""
+        if n_lines is None:
+            n_lines = _count_lines(text)
         
         # 基本的な文書ノード作成
         if ai_result.structure_type == 'section':
@@ -356,9 +808,9 @@ class HybridDocumentProcessor:
             metadata = {
                 'ai_confidence': ai_result.confidence,
                 'analysis_method': 'ai_primary',
-                'semantic_features': ai_result.semantic_features
+                'semantic_features': semantic_features_as_dict(ai_result.semantic_features)
             }
-            if 'has_markdown_header' in ai_result.semantic_features and ai_result.semantic_features['has_markdown_header']:
+            if ai_result.semantic_features[FEATURE_IDX['has_markdown_header']]:
                 metadata['header_level'] = self._extract_header_level(text)
                 metadata['header_style'] = 'markdown'
             
@@ -367,7 +819,7 @@ class HybridDocumentProcessor:
                 content=content,
                 metadata=metadata,
                 start_line=1,
-                end_line=len(text.split('\n'))
+                end_line=n_lines
             )
             
         elif ai_result.structure_type == 'list_item':
@@ -375,8 +827,8 @@ class HybridDocumentProcessor:
             metadata = {
                 'ai_confidence': ai_result.confidence,
                 'analysis_method': 'ai_primary',
-                'semantic_features': ai_result.semantic_features,
-                'list_type': 'ordered' if ai_result.semantic_features.get('has_numbered_list', 0) > 0 else 'unordered'
+                'semantic_features': semantic_features_as_dict(ai_result.semantic_features),
+                'list_type': 'ordered' if ai_result.semantic_features[FEATURE_IDX['has_numbered_list']] > 0 else 'unordered'
             }
             
             return DocumentNode(
@@ -384,14 +836,14 @@ class HybridDocumentProcessor:
                 content=content,
                 metadata=metadata,
                 start_line=1,
-                end_line=len(text.split('\n'))
+                end_line=n_lines
             )
             
         else:  # paragraph or other
             metadata = {
                 'ai_confidence': ai_result.confidence,
                 'analysis_method': 'ai_primary',
-                'semantic_features': ai_result.semantic_features
+                'semantic_features': semantic_features_as_dict(ai_result.semantic_features)
             }
             
             return DocumentNode(
@@ -399,52 +851,59 @@ class HybridDocumentProcessor:
                 content=text.strip(),
                 metadata=metadata,
                 start_line=1,
-                end_line=len(text.split('\n'))
+                end_line=n_lines
             )
     
-    def _process_with_rules(self, text: str) -> DocumentNode:
+    def _process_with_rules(self, text: str, n_lines: Optional[int] = None) -> DocumentNode:
         """ルールベース処理（既存システム使用）"""
+        if n_lines is None:
+            n_lines = _count_lines(text)
         
         if self.rule_processor:
             # 実際の既存システムを使用
             # 簡略化のため、基本的な処理を模擬
             pass
         
-        # デモ用の基本ルールベース処理
-        if re.match(r'^#{1,6}\s+', text.strip()):
-            content = re.sub(r'^#+\s*', '', text.strip())
+        # デモ用の基本ルールベース処理（先頭文字で分岐）
+        stripped = text.strip()
+        prefix_type = _prefix_structure_type(stripped)
+        if prefix_type == 'section':
+            content = _HEADER_SUB_RE.sub('', stripped)
             return DocumentNode(
                 node_type='section',
                 content=content,
                 metadata={'analysis_method': 'rule_based', 'header_style': 'markdown'},
                 start_line=1,
-                end_line=len(text.split('\n'))
+                end_line=n_lines
             )
-        elif re.match(r'^\s*[-*+]\s+', text.strip()) or re.match(r'^\s*\d+\.\s+', text.strip()):
-            content = re.sub(r'^\s*[-*+]\s*', '', text.strip())
-            content = re.sub(r'^\s*\d+\.\s*', '', content)
+        elif prefix_type == 'list_item':
+            content = _ULIST_SUB_RE.sub('', stripped)
+            content = _OLIST_SUB_RE.sub('', content)
             return DocumentNode(
                 node_type='list_item',
                 content=content,
                 metadata={'analysis_method': 'rule_based'},
                 start_line=1,
-                end_line=len(text.split('\n'))
+                end_line=n_lines
             )
         else:
             return DocumentNode(
                 node_type='paragraph',
-                content=text.strip(),
+                content=stripped,
                 metadata={'analysis_method': 'rule_based'},
                 start_line=1,
-                end_line=len(text.split('\n'))
+                end_line=n_lines
             )
     
-    def _hybrid_processing(self, text: str, ai_result: AIAnalysisResult) -> DocumentNode:
+    def _hybrid_processing(self, text: str, ai_result: AIAnalysisResult,
+                           n_lines: Optional[int] = None) -> DocumentNode:
         """ハイブリッド処理（AI + ルールの組み合わせ）"""
         
         # AI結果をベースにルールで補強
-        ai_node = self._build_document_from_ai_result(text, ai_result)
-        rule_node = self._process_with_rules(text)
+        if n_lines is None:
+            n_lines = _count_lines(text)
+        ai_node = self._build_document_from_ai_result(text, ai_result, n_lines)
+        rule_node = self._process_with_rules(text, n_lines)
         
         # 結果をマージ
         merged_metadata = ai_node.metadata.copy()
@@ -468,17 +927,17 @@ class HybridDocumentProcessor:
     
     def _extract_header_content(self, text: str) -> str:
         """見出しコンテンツを抽出"""
-        return re.sub(r'^#+\s*', '', text.strip())
+        return _HEADER_SUB_RE.sub('', text.strip())
     
     def _extract_list_item_content(self, text: str) -> str:
         """リストアイテムコンテンツを抽出"""
-        content = re.sub(r'^\s*[-*+]\s*', '', text.strip())
-        content = re.sub(r'^\s*\d+\.\s*', '', content)
+        content = _ULIST_SUB_RE.sub('', text.strip())
+        content = _OLIST_SUB_RE.sub('', content)
         return content
     
     def _extract_header_level(self, text: str) -> int:
         """見出しレベルを抽出"""
-        match = re.match(r'^(#+)', text.strip())
+        match = _HEADER_LEVEL_RE.match(text.strip())
         return len(match.group(1)) if match else 1
     
     def get_processing_stats(self) -> Dict[str, Any]:
@@ -562,14 +1021,11 @@ def main():
         "ハイブリッド処理により最適な結果が得られることが確認されました。"
     ]
     
-    results = []
-    for i, doc in enumerate(test_documents):
+    # AI解析は一括で実行
+    results = processor.process_documents(test_documents)
+    for i, (doc, result_node) in enumerate(zip(test_documents, results)):
         print(f"\n--- 文書 {i+1} ---")
         print(f"入力: {doc}")
-        
-        result_node = processor.process_document(doc)
-        results.append(result_node)
-        
         print(f"結果: {result_node.node_type} | {result_node.content}")
         print(f"メタデータ: {result_node.metadata}")
     
@@ -612,4 +1068,5 @@ def main():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     main()
\ No newline at end of file
@@ -4,79 +4,155 @@
 Translate chunks from sample_1.chunks.jsonl using the translator module
 """
 
+import asyncio
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator
+
+# orjson is optional; fall back to the stdlib json module when it is missing
+try:
+    import orjson
+
+    def _loads(line: bytes):
+        return orjson.loads(line)
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _loads(line: bytes):
+        return json.loads(line)
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
 
 # Add the local_translation path to sys.path
 sys.path.append(str(Path(__file__).resolve().parent.parent / "local_translation" / "translator"))
 from translator import Translator
 
 
-def translate_chunks(input_file: str, output_file: str):
+# Maximum number of in-flight translation requests
+MAX_CONCURRENCY = 16
+
+
+def iter_chunks(path: str) -> Iterator[dict]:
+    """Yield chunks one by one from a JSONL file (blank lines are skipped)"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield _loads(line)
+
+
+async def _translate(translator: Translator, text: str, semaphore: asyncio.Semaphore) -> str:
+    """Run the (synchronous) translator in a worker thread, bounded by the semaphore"""
+    async with semaphore:
+        return await asyncio.to_thread(translator.translate_text, text)
+
+
+async def _translate_chunk(translator: Translator, index: int, chunk: dict,
+                           semaphore: asyncio.Semaphore, out) -> None:
+    """Translate one chunk (text + sentences concurrently) and append it as a JSONL line"""
+    text = chunk.get('text', '')
+    sentences = chunk.get('sentences', [])
+    
+    translated_text, *translated_sentences = await asyncio.gather(
+        _translate(translator, text, semaphore),
+        *(_translate(translator, sentence, semaphore) for sentence in sentences)
+    )
+    
+    # Create translated chunk
+    translated_chunk = {
+        'chunk_index': index,
+        'original_text': text,
+        'translated_text': translated_text,
+        'original_sentences': sentences,
+        'translated_sentences': translated_sentences
+    }
+    
+    # Append one line per completed chunk (no rewrite of earlier results)
+    out.write(_dumps(translated_chunk) + b'\n')
+    out.flush()
+    
+    print(f"  Chunk {index+1} completed and saved")
+
+
+async def translate_chunks(input_file: str, output_file: str) -> int:
     """
     Translate sentences from chunks file
     
+    Chunks are streamed from the input and translated concurrently together
+    with their sentences (at most MAX_CONCURRENCY requests and chunks in
+    flight). Each completed chunk is appended to the output as one JSON
+    line; `chunk_index` keeps the input order.
+    
     Args:
         input_file: Input chunks file path
-        output_file: Output translated file path
+        output_file: Output translated JSONL file path
+    
+    Returns:
+        Number of chunks that failed to translate (missing from the output)
     """
     translator = Translator()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    # The default executor may have fewer workers than MAX_CONCURRENCY
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(MAX_CONCURRENCY))
     
-    # Read the chunks file
-    with open(input_file, 'r', encoding='utf-8') as f:
-        chunks = [json.loads(line) for line in f]
+    # Stream chunks from the input; only a bounded window of chunks is in flight
+    pending = {}
+    failed = 0
+    total = 0
     
-    translated_chunks = []
+    def collect(done) -> int:
+        errors = 0
+        for task in done:
+            index = pending.pop(task)
+            error = task.exception()
+            if error is not None:
+                print(f"  Chunk {index+1} failed: {error}")
+                errors += 1
+        return errors
     
-    print(f"Processing {len(chunks)} chunks...")
+    print(f"Processing chunks from {input_file}...")
     
-    for i, chunk in enumerate(chunks):
-        print(f"Processing chunk {i+1}/{len(chunks)}")
-        
-        # Get the text and sentences from the chunk
-        text = chunk.get('text', '')
-        sentences = chunk.get('sentences', [])
-        
-        # Translate the text
-        translated_text = translator.translate_text(text)
-        
-        # Translate each sentence
-        translated_sentences = []
-        for j, sentence in enumerate(sentences):
-            print(f"  Translating sentence {j+1}/{len(sentences)}")
-            translated_sentence = translator.translate_text(sentence)
-            translated_sentences.append(translated_sentence)
-        
-        # Create translated chunk
-        translated_chunk = {
-            'original_text': text,
-            'translated_text': translated_text,
-            'original_sentences': sentences,
-            'translated_sentences': translated_sentences
-        }
-        
-        translated_chunks.append(translated_chunk)
-        
-        # Save intermediate results after each chunk
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(translated_chunks, f, ensure_ascii=False, indent=2)
-        
-        print(f"  Chunk {i+1} completed and saved")
+    with open(output_file, 'wb') as out:
+        try:
+            for i, chunk in enumerate(iter_chunks(input_file)):
+                total += 1
+                task = asyncio.create_task(_translate_chunk(translator, i, chunk, semaphore, out))
+                pending[task] = i
+                if len(pending) >= MAX_CONCURRENCY:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    failed += collect(done)
+            if pending:
+                done, _ = await asyncio.wait(pending)
+                failed += collect(done)
+        finally:
+            # On an error (e.g. a malformed input line), stop in-flight chunks and
+            # retrieve their results before the output file is closed
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
     
-    print(f"Translation completed. Results saved to: {output_file}")
+    print(f"Translation completed ({total - failed}/{total} chunks). "
+          f"Results saved to: {output_file}")
+    return failed
 
 
 def main():
     """Main function"""
     input_file = "samples/sample_1.chunks.jsonl"
-    output_file = "samples/sample_1.translated.json"
+    output_file = "samples/sample_1.translated.jsonl"
     
     if not Path(input_file).exists():
         print(f"Error: Input file '{input_file}' not found.")
         sys.exit(1)
     
-    translate_chunks(input_file, output_file)
+    failed = asyncio.run(translate_chunks(input_file, output_file))
+    if failed:
+        # Do not let a partial output pass silently
+        print(f"Error: {failed} chunk(s) failed to translate; '{output_file}' is incomplete.")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
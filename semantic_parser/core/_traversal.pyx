@@ -0,0 +1,67 @@
+# cython: language_level=3, binding=True
+"""
+DocumentNode の木構造走査（Cython 版）
+
+document_node.py の find_children_by_type / get_text_length と同じ処理を
+型付きのループ変数で実装したものです。コンパイル済みの場合のみ
+document_node.py の読み込み時に DocumentNode のメソッドとして差し替えられ、
+未コンパイルの場合は純 Python 実装がそのまま使われます。
+
+ビルド例:
+    cythonize -i semantic_parser/core/_traversal.pyx
+"""
+
+
+cpdef list find_children_by_type(object self, str node_type):
+    """指定されたタイプの子ノードを検索（純 Python 版と同じ並び順）"""
+    cdef list result = []
+    cdef list stack = [self]
+    cdef list branches
+    cdef list children
+    cdef object child
+    cdef Py_ssize_t i
+
+    while stack:
+        children = stack.pop().children
+        branches = []
+        for child in children:
+            if child.node_type == node_type:
+                result.append(child)
+            if child.children:
+                branches.append(child)
+        for i in range(len(branches) - 1, -1, -1):
+            stack.append(branches[i])
+
+    return result
+
+
+cpdef Py_ssize_t get_text_length(object self) except -1:
+    """ノードのテキスト長を取得（子孫ノードのキャッシュも埋める）"""
+    if self._cached_length is not None:
+        return self._cached_length
+
+    cdef list stack = [self]
+    cdef list expanded = [False]
+    cdef object node
+    cdef object child
+    cdef bint done
+    cdef Py_ssize_t total_length
+
+    while stack:
+        node = stack.pop()
+        done = expanded.pop()
+        if node._cached_length is not None:
+            continue
+        if done:
+            total_length = len(node.content)
+            for child in node.children:
+                total_length += <Py_ssize_t>child._cached_length
+            node._cached_length = total_length
+        else:
+            stack.append(node)
+            expanded.append(True)
+            for child in node.children:
+                stack.append(child)
+                expanded.append(False)
+
+    return self._cached_length
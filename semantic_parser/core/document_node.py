@@ -10,12 +10,39 @@ Day 3-4: フォーマット復元機能の実装
 """
 
 from __future__ import annotations
+from collections import deque
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from io import StringIO
+from typing import List, Dict, Any, Optional, Callable, ClassVar, TextIO
+import json
+import logging
+from json.encoder import encode_basestring, encode_basestring_ascii
 import re
+import sys
+import weakref
 
+_logger = logging.getLogger(__name__)
 
-@dataclass
+
+# フォーマット処理で使用する正規表現（モジュール読み込み時に一度だけコンパイル）
+_RE_MD_HEADER_PREFIX = re.compile(r'^#+\s*')
+_RE_MULTI_SPACE = re.compile(r' +')
+_RE_TRAILING_SPACE = re.compile(r' +$', re.MULTILINE)
+
+
+# コンテンツ・子ノードが空の場合に出力も空になるノードタイプ
+# （list_item はマーカーを出力し、不明なタイプは警告を出すため含めない）
+_BLANK_WHEN_EMPTY = frozenset({'document', 'section', 'paragraph', 'list'})
+
+
+@lru_cache(maxsize=64)
+def _indent_str(width: int) -> str:
+    """指定幅の空白インデント文字列（同じ幅の兄弟リストアイテム間で共有）"""
+    return " " * width
+
+
+@dataclass(frozen=True, slots=True)
 class FormatConfig:
     """フォーマット設定クラス
     
@@ -29,6 +56,10 @@ class FormatConfig:
     normalize_whitespace: bool = False
 
 
+# format_config 省略時に共有するデフォルト設定（イミュータブルなので使い回し可能）
+_DEFAULT_FORMAT_CONFIG = FormatConfig()
+
+
 @dataclass
 class DocumentNode:
     """文書の階層構造ノード
@@ -47,6 +78,47 @@ class DocumentNode:
     metadata: Dict[str, Any] = field(default_factory=dict)
     start_line: int = 0
     end_line: int = 0
+    # ノードタイプ別の書き込み処理（クラス定義後に設定）
+    _WRITERS: ClassVar[Dict[str, Callable[..., None]]]
+    
+    def __post_init__(self) -> None:
+        # ノードタイプを intern し、パーサー等で動的に生成された文字列でも
+        # 比較・辞書引きがポインタ比較で済むようにする
+        if type(self.node_type) is str:
+            self.node_type = sys.intern(self.node_type)
+        # 以下は内部状態のため dataclass のフィールドにせず、asdict・比較・repr の対象から外す
+        # get_text_length のキャッシュ（add_child で自身と祖先ノードのキャッシュを無効化）
+        # 不変条件: キャッシュ済みノードの子孫はすべてキャッシュ済み
+        self._cached_length: Optional[int] = None
+        # 親ノードへの弱参照（キャッシュ無効化の伝播用）
+        self._parent: Optional[weakref.ReferenceType] = None
+        # コンストラクタで渡された子ノードにも親参照を張る
+        for child in self.children:
+            child._parent = weakref.ref(self)
+    
+    def __copy__(self) -> DocumentNode:
+        # 浅いコピーは子ノードを複製元と共有するため、子ノードの親参照は複製元のまま残す
+        cls = type(self)
+        copied = cls.__new__(cls)
+        copied.__dict__.update(self.__getstate__())
+        copied._cached_length = None
+        copied._parent = None
+        return copied
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # 弱参照は pickle できず、deepcopy では複製元の親を指したままになるため状態から除く
+        state = self.__dict__.copy()
+        state.pop('_parent', None)
+        state.pop('_cached_length', None)
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._cached_length = None
+        self._parent = None
+        # 復元した子ノードの親参照を張り直す（pickle・deepcopy のみ。子ノードは親より先に復元される）
+        for child in self.children:
+            child._parent = weakref.ref(self)
     
     def to_text(self, preserve_formatting: bool = True, format_config: Optional[FormatConfig] = None) -> str:
         """フォーマットを保持したテキスト出力
@@ -62,27 +134,67 @@ class DocumentNode:
             ValueError: 不正なノードタイプの場合
         """
         if format_config is None:
-            format_config = FormatConfig()
+            # デフォルト設定ではインデント情報を持たない段落はコンテンツがそのまま出力になる
+            # （_format_paragraph がサブクラスやインスタンスで差し替えられている場合は通常の経路で処理）
+            if (self.node_type == 'paragraph' and preserve_formatting
+                    and not self.metadata.get('original_indent')
+                    and type(self)._format_paragraph is DocumentNode._format_paragraph
+                    and '_format_paragraph' not in self.__dict__):
+                return self.content
+            format_config = _DEFAULT_FORMAT_CONFIG
+
+        # 文書全体で一つのバッファへ書き込み、子ノードの文字列を階層ごとに連結し直さない
+        buf = StringIO()
+        self._write_to(buf, preserve_formatting, format_config)
+        return buf.getvalue()
+    
+    def _write_to(self, buf: StringIO, preserve_formatting: bool, format_config: FormatConfig) -> None:
+        """ノードのテキストをバッファへ書き込む（to_text の本体）
         
+        Args:
+            buf: 書き込み先バッファ
+            preserve_formatting: フォーマット保持の有無
+            format_config: フォーマット設定
+        """
+        start = buf.tell()
         try:
-            if self.node_type == 'list':
-                return self._format_list(preserve_formatting, format_config)
-            elif self.node_type == 'section':
-                return self._format_section(preserve_formatting, format_config)
-            elif self.node_type == 'paragraph':
-                return self._format_paragraph(preserve_formatting, format_config)
-            elif self.node_type == 'document':
-                return self._format_document(preserve_formatting, format_config)
-            elif self.node_type == 'list_item':
-                return self._format_list_item(preserve_formatting, format_config)
+            # ノードタイプ別の書き込み処理を表引きで選択
+            writer = self._WRITERS.get(self.node_type)
+            if writer is not None:
+                writer(self, buf, preserve_formatting, format_config)
             else:
                 # 不明なノードタイプの場合は警告してから基本的なフォーマット
                 self._log_warning(f"不明なノードタイプ: {self.node_type}")
-                return self._format_unknown_node(preserve_formatting, format_config)
+                buf.write(self._format_unknown_node(preserve_formatting, format_config))
         except Exception as e:
-            # フォーマット処理中のエラーをキャッチしてフォールバック
+            # フォーマット処理中のエラーをキャッチし、このノードの書き込み分を破棄してフォールバック
             self._log_error(f"フォーマット処理エラー: {e}")
-            return self.content if self.content else ""
+            buf.seek(start)
+            buf.truncate()
+            buf.write(self.content if self.content else "")
+    
+    def _write_child(self, buf: StringIO, child: DocumentNode, separator: str,
+                     preserve_formatting: bool, format_config: FormatConfig) -> bool:
+        """区切り文字に続けて子ノードを書き込む
+        
+        子ノードの出力が空の場合は区切り文字ごと取り消します。
+        
+        Returns:
+            子ノードの出力があったか
+        """
+        # コンテンツも子ノードも持たないノードは出力が空になるため書き込み自体を省略
+        if not child.content and not child.children and child.node_type in _BLANK_WHEN_EMPTY:
+            return False
+        
+        separator_start = buf.tell()
+        buf.write(separator)
+        child_start = buf.tell()
+        child._write_to(buf, preserve_formatting, format_config)
+        if buf.tell() == child_start:
+            buf.seek(separator_start)
+            buf.truncate()
+            return False
+        return True
     
     def add_child(self, child: DocumentNode) -> None:
         """子ノードを追加
@@ -93,10 +205,13 @@ class DocumentNode:
         Raises:
             TypeError: 不正な型の子ノードの場合
         """
-        if not isinstance(child, DocumentNode):
+        # 通常は型の同一性比較のみで判定し、サブクラスの場合に限り isinstance で確認
+        if type(child) is not DocumentNode and not isinstance(child, DocumentNode):
             raise TypeError("子ノードはDocumentNodeインスタンスである必要があります")
         
         self.children.append(child)
+        child._parent = weakref.ref(self)
+        self.invalidate_text_length()
         
         # 行番号範囲を更新
         if child.start_line > 0:
@@ -116,31 +231,66 @@ class DocumentNode:
             マッチする子ノードのリスト
         """
         result = []
-        
-        # 直接の子ノードをチェック
-        for child in self.children:
-            if child.node_type == node_type:
-                result.append(child)
-        
-        # 再帰的に検索
-        for child in self.children:
-            result.extend(child.find_children_by_type(node_type))
+        append = result.append
+        
+        # 再帰を使わずスタックで走査する（深いネストでも再帰上限に達しない）
+        # 各ノードで「直接の子ノードのマッチ」→「各子ノードの配下」の順に並べる
+        stack = deque([self])
+        while stack:
+            # 子ノードの照合と、配下を持つ子ノード（葉以外）の収集を一度のループで行う
+            branches = []
+            for child in stack.pop().children:
+                if child.node_type == node_type:
+                    append(child)
+                if child.children:
+                    branches.append(child)
+            stack.extend(reversed(branches))
         
         return result
     
     def get_text_length(self) -> int:
         """ノードのテキスト長を取得
         
+        計算結果はノードにキャッシュされます。add_child を経由せずに
+        content や children を直接変更した場合は invalidate_text_length() を呼び出してください。
+        
         Returns:
             テキスト長（文字数）
         """
-        total_length = len(self.content)
+        if self._cached_length is not None:
+            return self._cached_length
+        
+        # 帰りがけ順のスタック走査で子孫ノードのキャッシュも一度に埋める（再帰呼び出しなし）
+        # キャッシュ済みのノードは配下もキャッシュ済みのため、それ以上辿らない
+        stack = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node._cached_length is not None:
+                continue
+            if expanded:
+                total_length = len(node.content)
+                for child in node.children:
+                    total_length += child._cached_length
+                node._cached_length = total_length
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children)
         
-        # 子ノードのテキスト長を加算
-        for child in self.children:
-            total_length += child.get_text_length()
+        return self._cached_length
+    
+    def invalidate_text_length(self) -> None:
+        """自身と祖先ノードのテキスト長キャッシュを無効化
         
-        return total_length
+        祖先がキャッシュ済みなら子孫もキャッシュ済みであるため、
+        キャッシュを持たない祖先に達した時点で打ち切る。
+        """
+        node = self
+        while True:
+            node._cached_length = None
+            parent = node._parent() if node._parent is not None else None
+            if parent is None or parent._cached_length is None:
+                break
+            node = parent
     
     def to_dict(self) -> Dict[str, Any]:
         """辞書形式に変換（JSON出力用）
@@ -148,82 +298,155 @@ class DocumentNode:
         Returns:
             辞書形式の表現
         """
-        return {
-            'node_type': self.node_type,
-            'content': self.content,
-            'children': [child.to_dict() for child in self.children],
-            'metadata': self.metadata,
-            'start_line': self.start_line,
-            'end_line': self.end_line,
-            'text_length': self.get_text_length()
-        }
-    
-    def _format_list(self, preserve_formatting: bool, format_config: FormatConfig) -> str:
+        # 帰りがけ順のスタック走査で子ノードの辞書から順に組み立てる（再帰呼び出しなし）
+        # text_length は子ノードの辞書の値から加算し、テキスト長キャッシュにも反映する
+        results: List[Dict[str, Any]] = []
+        stack = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+                continue
+            
+            child_count = len(node.children)
+            if child_count:
+                child_dicts = results[-child_count:]
+                del results[-child_count:]
+            else:
+                child_dicts = []
+            
+            text_length = len(node.content)
+            for child_dict in child_dicts:
+                text_length += child_dict['text_length']
+            node._cached_length = text_length
+            
+            results.append({
+                'node_type': node.node_type,
+                'content': node.content,
+                'children': child_dicts,
+                'metadata': node.metadata,
+                'start_line': node.start_line,
+                'end_line': node.end_line,
+                'text_length': text_length
+            })
+        
+        return results[0]
+    
+    def to_json(self, out: TextIO, ensure_ascii: bool = False) -> None:
+        """JSON形式でストリームへ直接書き出す
+        
+        json.dump(self.to_dict(), out, ensure_ascii=ensure_ascii) と同じ出力を、
+        中間の辞書を作らずに行きがけ順のスタック走査で書き出します。
+        text_length は子ノードを書き出しながら加算します。
+        
+        Args:
+            out: 書き込み先のテキストストリーム
+            ensure_ascii: 非ASCII文字をエスケープするか
+        """
+        encode_str = encode_basestring_ascii if ensure_ascii else encode_basestring
+        
+        def encode(value: Any) -> str:
+            if type(value) is str:
+                return encode_str(value)
+            return json.dumps(value, ensure_ascii=ensure_ascii)
+        
+        def write_head(node: DocumentNode) -> None:
+            out.write(f'{{"node_type": {encode(node.node_type)}, '
+                      f'"content": {encode(node.content)}, "children": [')
+        
+        # フレーム: [ノード, 次に書き出す子ノードの位置, テキスト長の累計]
+        write_head(self)
+        frames = [[self, 0, len(self.content)]]
+        while frames:
+            frame = frames[-1]
+            node, index = frame[0], frame[1]
+            if index < len(node.children):
+                child = node.children[index]
+                frame[1] = index + 1
+                if index:
+                    out.write(', ')
+                write_head(child)
+                frames.append([child, 0, len(child.content)])
+                continue
+            
+            frames.pop()
+            text_length = frame[2]
+            node._cached_length = text_length
+            if frames:
+                frames[-1][2] += text_length
+            out.write(f'], "metadata": {json.dumps(node.metadata, ensure_ascii=ensure_ascii)}, '
+                      f'"start_line": {encode(node.start_line)}, "end_line": {encode(node.end_line)}, '
+                      f'"text_length": {text_length}}}')
+    
+    def _write_list(self, buf: StringIO, preserve_formatting: bool, format_config: FormatConfig) -> None:
         """リストのフォーマット処理
         
         Args:
+            buf: 書き込み先バッファ
             preserve_formatting: フォーマット保持の有無
             format_config: フォーマット設定
-            
-        Returns:
-            フォーマットされたリストテキスト
         """
         if not preserve_formatting:
-            return self.content
+            buf.write(self.content)
+            return
         
-        lines = []
+        has_line = False
+        last_index = len(self.children) - 1
         
         # リストアイテムをフォーマット
         for i, child in enumerate(self.children):
             if child.node_type == 'list_item':
-                formatted_item = child._format_list_item(preserve_formatting, format_config)
-                lines.append(formatted_item)
+                if has_line:
+                    buf.write('\n')
+                child._write_list_item(buf, preserve_formatting, format_config)
+                has_line = True
                 
                 # リストアイテム間の空行処理
-                if (i < len(self.children) - 1 and 
+                if (i < last_index and 
                     format_config.preserve_blank_lines and 
                     self._should_add_blank_line_after_item(child)):
-                    lines.append("")
-        
-        return '\n'.join(lines)
+                    buf.write('\n')
     
-    def _format_section(self, preserve_formatting: bool, format_config: FormatConfig) -> str:
+    def _write_section(self, buf: StringIO, preserve_formatting: bool, format_config: FormatConfig) -> None:
         """セクションのフォーマット処理
         
         Args:
+            buf: 書き込み先バッファ
             preserve_formatting: フォーマット保持の有無
             format_config: フォーマット設定
-            
-        Returns:
-            フォーマットされたセクションテキスト
         """
         if not preserve_formatting:
-            return self.content
+            buf.write(self.content)
+            return
         
-        lines = []
+        has_line = False
         
         # セクションヘッダーを追加
         if self.content:
-            header_text = self._format_section_header(format_config)
-            lines.append(header_text)
+            buf.write(self._format_section_header(format_config))
+            has_line = True
             
             # セクション見出し後の空行
             if format_config.preserve_blank_lines and format_config.section_spacing > 0:
-                lines.extend([""] * format_config.section_spacing)
+                buf.write('\n' * format_config.section_spacing)
         
         # 子ノードをフォーマット
-        for i, child in enumerate(self.children):
-            child_text = child.to_text(preserve_formatting, format_config)
-            if child_text:
-                lines.append(child_text)
+        children = self.children
+        last_index = len(children) - 1
+        for i, child in enumerate(children):
+            if self._write_child(buf, child, '\n' if has_line else '', preserve_formatting, format_config):
+                has_line = True
                 
                 # 子ノード間の空行処理
-                if (i < len(self.children) - 1 and 
+                if (i < last_index and 
                     format_config.preserve_blank_lines and 
-                    self._should_add_blank_line_after_child(child, self.children[i + 1])):
-                    lines.append("")
-        
-        return '\n'.join(lines)
+                    self._should_add_blank_line_after_child(child, children[i + 1])):
+                    buf.write('\n')
+    
+    def _write_paragraph(self, buf: StringIO, preserve_formatting: bool, format_config: FormatConfig) -> None:
+        """段落のテキストをバッファへ書き込む"""
+        buf.write(self._format_paragraph(preserve_formatting, format_config))
     
     def _format_paragraph(self, preserve_formatting: bool, format_config: FormatConfig) -> str:
         """段落のフォーマット処理
@@ -255,102 +478,83 @@ class DocumentNode:
         
         return content
     
-    def _format_document(self, preserve_formatting: bool, format_config: FormatConfig) -> str:
+    def _write_document(self, buf: StringIO, preserve_formatting: bool, format_config: FormatConfig) -> None:
         """文書のフォーマット処理
         
         Args:
+            buf: 書き込み先バッファ
             preserve_formatting: フォーマット保持の有無
             format_config: フォーマット設定
-            
-        Returns:
-            フォーマットされた文書テキスト
         """
         if not preserve_formatting:
-            return self.content
+            buf.write(self.content)
+            return
         
-        lines = []
+        has_line = False
         
         # ドキュメントレベルのコンテンツがある場合は追加
         if self.content:
             # 文書タイトルをMarkdown形式で出力
-            lines.append(f"# {self.content}")
+            buf.write(f"# {self.content}")
+            has_line = True
             
             # 文書タイトル後の空行
             if format_config.preserve_blank_lines and self.children:
-                lines.extend([""] * format_config.section_spacing)
+                buf.write('\n' * format_config.section_spacing)
         
         # 子ノードをフォーマット
+        last_index = len(self.children) - 1
         for i, child in enumerate(self.children):
-            child_text = child.to_text(preserve_formatting, format_config)
-            if child_text:
-                lines.append(child_text)
+            if self._write_child(buf, child, '\n' if has_line else '', preserve_formatting, format_config):
+                has_line = True
                 
                 # セクション間の空行処理
-                if (i < len(self.children) - 1 and 
+                if (i < last_index and 
                     format_config.preserve_blank_lines and 
                     child.node_type == 'section'):
-                    lines.extend([""] * format_config.section_spacing)
-        
-        return '\n'.join(lines)
+                    buf.write('\n' * format_config.section_spacing)
     
-    def _format_list_item(self, preserve_formatting: bool, format_config: FormatConfig) -> str:
+    def _write_list_item(self, buf: StringIO, preserve_formatting: bool, format_config: FormatConfig) -> None:
         """リストアイテムのフォーマット処理
         
         Args:
+            buf: 書き込み先バッファ
             preserve_formatting: フォーマット保持の有無
             format_config: フォーマット設定
-            
-        Returns:
-            フォーマットされたリストアイテムテキスト
         """
         if not preserve_formatting:
-            return self.content
+            buf.write(self.content)
+            return
         
         # インデントレベルを取得
-        indent_level = self.metadata.get('indent_level', 0)
-        list_type = self.metadata.get('list_type', 'unordered')
-        item_number = self.metadata.get('item_number', 1)
+        metadata = self.metadata
+        indent_level = metadata.get('indent_level', 0)
+        list_type = metadata.get('list_type', 'unordered')
+        item_number = metadata.get('item_number', 1)
         
         # インデントを作成
         if format_config.preserve_original_indentation:
-            original_indent = self.metadata.get('original_indent', '')
+            original_indent = metadata.get('original_indent', '')
             if original_indent:
                 indent = original_indent
             else:
-                indent = " " * (indent_level * format_config.list_indent_size)
+                indent = _indent_str(indent_level * format_config.list_indent_size)
         else:
-            indent = " " * (indent_level * format_config.list_indent_size)
+            indent = _indent_str(indent_level * format_config.list_indent_size)
         
-        # リストマーカーを決定
-        marker = self._get_list_marker(list_type, item_number, indent_level)
+        # リストマーカーを決定（順序なしリストはすべてのレベルで統一されたマーカーを使用）
+        marker = f"{item_number}." if list_type == 'ordered' else '-'
         
-        # コンテンツの複数行処理
-        content_lines = self.content.split('\n')
-        formatted_lines = []
+        # コンテンツの複数行処理（最初の行はマーカー付き、続行行は適切にインデント）
+        content = self.content
+        if '\n' in content:
+            continuation_indent = _indent_str(len(indent) + len(marker) + 1)
+            content = content.replace('\n', '\n' + continuation_indent)
+        buf.write(f"{indent}{marker} {content}")
         
-        for i, line in enumerate(content_lines):
-            if i == 0:
-                # 最初の行はマーカー付き
-                formatted_lines.append(f"{indent}{marker} {line}")
-            else:
-                # 続行行は適切にインデント
-                continuation_indent = " " * (len(indent) + len(marker) + 1)
-                formatted_lines.append(f"{continuation_indent}{line}")
-        
-        # 子ノード（ネストしたリスト）の処理を追加
-        if self.children:
-            for child in self.children:
-                child_text = child.to_text(preserve_formatting, format_config)
-                if child_text:
-                    # 子ノードの各行を適切にインデント
-                    child_lines = child_text.split('\n')
-                    for child_line in child_lines:
-                        if child_line.strip():  # 空行でない場合
-                            formatted_lines.append(child_line)
-                        else:
-                            formatted_lines.append(child_line)
-        
-        return '\n'.join(formatted_lines)
+        # 子ノード（ネストしたリスト）は各行をそのまま続けて出力
+        for child in self.children:
+            self._write_child(buf, child, '\n', preserve_formatting, format_config)
     
     def _format_section_header(self, format_config: FormatConfig) -> str:
         """セクションヘッダーのフォーマット処理
@@ -361,36 +565,20 @@ class DocumentNode:
         Returns:
             フォーマットされたセクションヘッダー
         """
-        header_level = self.metadata.get('header_level', 1)
-        header_style = self.metadata.get('header_style', 'markdown')
+        metadata = self.metadata
+        header_level = metadata.get('header_level', 1)
+        header_style = metadata.get('header_style', 'markdown')
         
         content = self.content
         
         # Markdownスタイルのヘッダー調整
         if header_style == 'markdown':
             # 既存の#を削除してから正しいレベルで追加
-            content = re.sub(r'^#+\s*', '', content)
+            content = _RE_MD_HEADER_PREFIX.sub('', content)
             content = f"{'#' * header_level} {content}"
         
         return content
     
-    def _get_list_marker(self, list_type: str, item_number: int, indent_level: int) -> str:
-        """リストマーカーを取得
-        
-        Args:
-            list_type: リストタイプ ('ordered', 'unordered')
-            item_number: アイテム番号
-            indent_level: インデントレベル
-            
-        Returns:
-            適切なリストマーカー
-        """
-        if list_type == 'ordered':
-            return f"{item_number}."
-        else:
-            # すべてのレベルで統一されたマーカーを使用
-            return '-'
-    
     def _preserve_original_line_breaks(self, content: str) -> str:
         """元の改行パターンを保持
         
@@ -400,13 +588,7 @@ class DocumentNode:
         Returns:
             改行が保持されたコンテンツ
         """
-        # メタデータに元の改行情報があれば使用
-        original_breaks = self.metadata.get('original_line_breaks', [])
-        if original_breaks:
-            # 元の改行位置を復元
-            lines = content.split('\n')
-            return '\n'.join(lines)
-        
+        # 改行位置はコンテンツにそのまま保持されているため、分割・再結合は不要
         return content
     
     def _normalize_whitespace(self, content: str) -> str:
@@ -419,9 +601,9 @@ class DocumentNode:
             正規化されたコンテンツ
         """
         # 複数のスペースを単一スペースに
-        content = re.sub(r' +', ' ', content)
+        content = _RE_MULTI_SPACE.sub(' ', content)
         # 行末のスペースを削除
-        content = re.sub(r' +$', '', content, flags=re.MULTILINE)
+        content = _RE_TRAILING_SPACE.sub('', content)
         return content
     
     def _preserve_paragraph_indentation(self, content: str) -> str:
@@ -435,6 +617,10 @@ class DocumentNode:
         """
         original_indent = self.metadata.get('original_indent', '')
         if original_indent:
+            # 単一行なら分割・再結合を行わない
+            if '\n' not in content:
+                return f"{original_indent}{content}" if content.strip() else content
+            # splitlines() は末尾改行や '\r' の扱いが異なるため '\n' 区切りを維持
             lines = content.split('\n')
             indented_lines = [f"{original_indent}{line}" if line.strip() else line 
                              for line in lines]
@@ -502,8 +688,7 @@ class DocumentNode:
         Args:
             message: 警告メッセージ
         """
-        # 実際の実装では適切なロガーを使用
-        print(f"WARNING: {message}")
+        _logger.warning(message)
     
     def _log_error(self, message: str) -> None:
         """エラーログの出力
@@ -511,8 +696,7 @@ class DocumentNode:
         Args:
             message: エラーメッセージ
         """
-        # 実際の実装では適切なロガーを使用
-        print(f"ERROR: {message}")
+        _logger.error(message)
     
     def __str__(self) -> str:
         """文字列表現
@@ -532,4 +716,23 @@ class DocumentNode:
                 f"content='{self.content[:30]}...', "
                 f"children_count={len(self.children)}, "
                 f"metadata={self.metadata}, "
-                f"lines={self.start_line}-{self.end_line})")
\ No newline at end of file
+                f"lines={self.start_line}-{self.end_line})")
+
+
+# ノードタイプ → 書き込み処理の対応表（DocumentNode._write_to で使用）
+DocumentNode._WRITERS = {
+    'list': DocumentNode._write_list,
+    'section': DocumentNode._write_section,
+    'paragraph': DocumentNode._write_paragraph,
+    'document': DocumentNode._write_document,
+    'list_item': DocumentNode._write_list_item,
+}
+
+# Cython 版の走査処理（_traversal.pyx）がコンパイル済みなら差し替える
+try:
+    from . import _traversal
+except ImportError:
+    pass
+else:
+    DocumentNode.find_children_by_type = _traversal.find_children_by_type
+    DocumentNode.get_text_length = _traversal.get_text_length
@@ -9,13 +9,29 @@ SemanticDocumentParser - 構造化文書のセマンティック解析エンジ
 """
 
 from __future__ import annotations
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Tuple, Union
+import logging
 import re
 from dataclasses import dataclass
 from .document_node import DocumentNode
 
+_logger = logging.getLogger(__name__)
 
-@dataclass
+
+# 文ごとに呼ばれる抽出・クリーンアップ処理で使う正規表現（事前コンパイル）
+_RE_HEADER_LEVEL = re.compile(r'header_level_(\d+)')
+# 見出しスタイル（markdown グループの有無で Markdown 見出しと番号付き見出しを判別）
+_RE_HEADER_STYLE = re.compile(r'^(?:(?P<markdown>#+)|\d+\.)\s')
+_RE_ORDERED_ITEM = re.compile(r'^\s*(\d+)\.\s+')
+_RE_LEADING_SPACE = re.compile(r'^(\s*)')
+# リストアイテムの先頭（インデントと番号を一度の照合で取得、番号がなければ順序なし）
+_RE_LIST_ITEM_PREFIX = re.compile(r'^(?P<indent>\s*)(?:(?P<number>\d+)\.\s)?')
+# 見出し記号・リストマーカーの除去（従来の2段階の置換を順に適用した結果と同じになる）
+_RE_HEADER_PREFIX = re.compile(r'^(?:#+\s*)?(?:\d+\.\s*)?')
+_RE_LIST_MARKER = re.compile(r'^(?:\s*[-*+]\s*)?(?:\s*\d+\.\s*)?')
+
+
+@dataclass(slots=True)
 class DocumentStructureConfig:
     """文書構造設定クラス
     
@@ -36,6 +52,9 @@ class DocumentStructureConfig:
     # 構造境界認識設定
     section_boundary_patterns: Optional[List[str]] = None
     
+    # デバッグ用メタデータ（元の文テキスト original_text）をノードに保持するか
+    include_debug_metadata: bool = False
+    
     def __post_init__(self):
         """設定の初期化"""
         if self.header_patterns is None:
@@ -68,7 +87,7 @@ class DocumentStructureConfig:
             ]
 
 
-@dataclass
+@dataclass(slots=True)
 class StructuredSentence:
     """構造化された文データクラス
     
@@ -99,8 +118,13 @@ class SemanticDocumentParser:
         """
         self.config = config if config is not None else DocumentStructureConfig()
         self._current_section_stack: List[DocumentNode] = []
-        self._current_list_stack: List[DocumentNode] = []
+        # _current_section_stack と対になる見出しレベルのスタック（メタデータを毎回引かない）
+        self._current_section_levels: List[int] = []
+        # 現在のコンテキストのリストノード（(リストタイプ, インデントレベル) で引く）
+        self._current_list_map: Dict[Tuple[str, int], DocumentNode] = {}
         self._line_number = 0
+        # 文書タイトル（最初の見出し）を設定済みか
+        self._has_document_title = False
     
     def parse(self, structured_sentences: List[StructuredSentence]) -> DocumentNode:
         """構造化された文リストから文書ノードを生成
@@ -122,71 +146,97 @@ class SemanticDocumentParser:
                 end_line=0
             )
         
-        # 文書ルートノードを作成
+        # 文書ルートノードを作成（タイトルは最初の見出しの処理時に設定）
         document_node = DocumentNode(
             node_type='document',
-            content=self._extract_document_title(structured_sentences),
+            content='',
             start_line=1,
             end_line=len(structured_sentences)
         )
         
         # 解析状態を初期化
         self._current_section_stack = []
-        self._current_list_stack = []
+        self._current_section_levels = []
+        self._current_list_map = {}
         self._line_number = 0
+        self._has_document_title = False
+        
+        # 文を順次処理（構造情報ごとの処理を表引きで選択し、段落文は paragraph_sentences に蓄積）
+        # 最も多い段落文はメソッド呼び出しを介さず直接蓄積する
+        paragraph_sentences: List[StructuredSentence] = []
+        append_paragraph = paragraph_sentences.append
+        handlers = {
+            'header': self._handle_header,
+            'list_item': self._handle_list_item,
+            'blank': self._handle_blank,
+        }
         
-        # 文を順次処理
-        current_paragraph_sentences = []
-        
-        for sentence in structured_sentences:
-            self._line_number = sentence.line_number
-            
+        # 例外処理は文ごとのループの外に置き、エラー発生時は次の文から走査を再開する
+        sentence_iter = iter(structured_sentences)
+        while True:
             try:
-                if sentence.structure_info == 'header':
-                    # 段落を完了してからヘッダーを処理
-                    if current_paragraph_sentences:
-                        paragraph_node = self._create_paragraph_node(current_paragraph_sentences)
-                        self._add_node_to_current_context(paragraph_node)
-                        current_paragraph_sentences = []
-                    
-                    # ヘッダーノードを作成
-                    section_node = self._create_section_node(sentence)
-                    self._add_section_to_document(document_node, section_node)
-                    
-                elif sentence.structure_info == 'list_item':
-                    # 段落を完了してからリストアイテムを処理
-                    if current_paragraph_sentences:
-                        paragraph_node = self._create_paragraph_node(current_paragraph_sentences)
-                        self._add_node_to_current_context(paragraph_node)
-                        current_paragraph_sentences = []
+                for sentence in sentence_iter:
+                    self._line_number = sentence.line_number
                     
-                    # リストアイテムノードを作成
-                    list_item_node = self._create_list_item_node(sentence)
-                    self._add_list_item_to_context(list_item_node, document_node)
+                    structure_info = sentence.structure_info
+                    if structure_info == 'paragraph':
+                        append_paragraph(sentence)
+                        continue
                     
-                elif sentence.structure_info == 'paragraph':
-                    # 段落文を蓄積
-                    current_paragraph_sentences.append(sentence)
-                    
-                elif sentence.structure_info == 'blank':
-                    # 空行は段落の区切りとして処理
-                    if current_paragraph_sentences:
-                        paragraph_node = self._create_paragraph_node(current_paragraph_sentences)
-                        self._add_node_to_current_context(paragraph_node)
-                        current_paragraph_sentences = []
-                
+                    handler = handlers.get(structure_info)
+                    if handler is not None:
+                        handler(sentence, document_node, paragraph_sentences)
+                break
             except Exception as e:
                 # エラーログを記録して処理を続行
-                self._log_error(f"文の解析中にエラーが発生: {sentence.text[:50]}... - {e}")
-                continue
+                self._log_error("文の解析中にエラーが発生: %s... - %s", sentence.text[:50], e)
         
         # 最後の段落を処理
-        if current_paragraph_sentences:
-            paragraph_node = self._create_paragraph_node(current_paragraph_sentences)
-            self._add_node_to_current_context(paragraph_node)
+        self._flush_paragraph(paragraph_sentences)
         
         return document_node
     
+    def _flush_paragraph(self, paragraph_sentences: List[StructuredSentence]) -> None:
+        """蓄積した段落文から段落ノードを作成して現在のコンテキストに追加
+        
+        Args:
+            paragraph_sentences: 蓄積中の段落文（追加後に空にする）
+        """
+        if paragraph_sentences:
+            paragraph_node = self._create_paragraph_node(paragraph_sentences)
+            self._add_node_to_current_context(paragraph_node)
+            paragraph_sentences.clear()
+    
+    def _handle_header(self, sentence: StructuredSentence, document_node: DocumentNode,
+                       paragraph_sentences: List[StructuredSentence]) -> None:
+        """見出し文の処理"""
+        # 最初の見出しを文書タイトルとして使用（文リストの事前走査を行わない）
+        if not self._has_document_title:
+            document_node.content = self._clean_header_text(sentence.text)
+            self._has_document_title = True
+        
+        # 段落を完了してからヘッダーを処理
+        self._flush_paragraph(paragraph_sentences)
+        
+        # ヘッダーノードを作成
+        section_node = self._create_section_node(sentence)
+        self._add_section_to_document(document_node, section_node)
+    
+    def _handle_list_item(self, sentence: StructuredSentence, document_node: DocumentNode,
+                          paragraph_sentences: List[StructuredSentence]) -> None:
+        """リストアイテム文の処理"""
+        # 段落を完了してからリストアイテムを処理
+        self._flush_paragraph(paragraph_sentences)
+        
+        # リストアイテムノードを作成
+        list_item_node = self._create_list_item_node(sentence)
+        self._add_list_item_to_context(list_item_node, document_node)
+    
+    def _handle_blank(self, sentence: StructuredSentence, document_node: DocumentNode,
+                      paragraph_sentences: List[StructuredSentence]) -> None:
+        """空行の処理（段落の区切りとして処理）"""
+        self._flush_paragraph(paragraph_sentences)
+    
     def _create_section_node(self, sentence: StructuredSentence) -> DocumentNode:
         """セクションノードを作成
         
@@ -196,20 +246,21 @@ class SemanticDocumentParser:
         Returns:
             セクションノード
         """
-                 header_level = self._extract_header_level(sentence.structure_info)
-         header_style = self._extract_header_style(sentence.text)
-         
-         # 見出しテキストをクリーンアップ
-         cleaned_content = self._clean_header_text(sentence.text)
-         
-         metadata = {
-             'header_level': header_level,
-             'header_style': header_style,
-             'original_text': sentence.text,
-             'indent_level': sentence.indent_level
-         }
-         if sentence.metadata:
-             metadata.update(sentence.metadata)
+        header_level = self._extract_header_level(sentence.structure_info)
+        header_style = self._extract_header_style(sentence.text)
+        
+        # 見出しテキストをクリーンアップ
+        cleaned_content = self._clean_header_text(sentence.text)
+        
+        # 文のメタデータは辞書リテラル内で展開して上書き（構築後の update を行わない）
+        metadata = {
+            'header_level': header_level,
+            'header_style': header_style,
+            'indent_level': sentence.indent_level,
+            **(sentence.metadata or {})
+        }
+        if self.config.include_debug_metadata:
+            metadata.setdefault('original_text', sentence.text)
         
         return DocumentNode(
             node_type='section',
@@ -250,21 +301,30 @@ class SemanticDocumentParser:
         Returns:
             リストアイテムノード
         """
-                 list_type = self._extract_list_type(sentence.text)
-         item_number = self._extract_item_number(sentence.text)
-         
-         # リストアイテムテキストをクリーンアップ
-         cleaned_content = self._clean_list_item_text(sentence.text)
-         
-         metadata = {
-             'list_type': list_type,
-             'item_number': item_number,
-             'indent_level': sentence.indent_level,
-             'original_text': sentence.text,
-             'original_indent': self._extract_original_indent(sentence.text)
-         }
-         if sentence.metadata:
-             metadata.update(sentence.metadata)
+        # リストタイプ・アイテム番号・元のインデントを一度の照合でまとめて抽出
+        prefix = _RE_LIST_ITEM_PREFIX.match(sentence.text)
+        number = prefix.group('number')
+        if number is not None:
+            list_type = 'ordered'
+            item_number = int(number)
+        else:
+            list_type = 'unordered'
+            item_number = 1
+        
+        # リストアイテムテキストをクリーンアップ
+        cleaned_content = self._clean_list_item_text(sentence.text)
+        
+        # original_indent はインデント復元に使うため常に保持
+        # 文のメタデータは辞書リテラル内で展開して上書き（構築後の update を行わない）
+        metadata = {
+            'list_type': list_type,
+            'item_number': item_number,
+            'indent_level': sentence.indent_level,
+            'original_indent': prefix.group('indent'),
+            **(sentence.metadata or {})
+        }
+        if self.config.include_debug_metadata:
+            metadata.setdefault('original_text', sentence.text)
         
         return DocumentNode(
             node_type='list_item',
@@ -294,17 +354,14 @@ class SemanticDocumentParser:
         # 段落テキストを結合
         paragraph_text = self._combine_paragraph_sentences(sentences)
         
-        # メタデータを収集
+        # メタデータを収集（最初の文のメタデータを辞書リテラル内で展開して継承）
         metadata = {
             'sentence_count': len(sentences),
             'original_line_breaks': self._extract_line_breaks(sentences),
-            'indent_level': sentences[0].indent_level if sentences else 0
+            'indent_level': sentences[0].indent_level,
+            **(sentences[0].metadata or {})
         }
         
-        # 最初の文からメタデータを継承
-        if sentences[0].metadata:
-            metadata.update(sentences[0].metadata)
-        
         return DocumentNode(
             node_type='paragraph',
             content=paragraph_text,
@@ -333,23 +390,6 @@ class SemanticDocumentParser:
         return (current_list_type == sentence_list_type and 
                 sentence.indent_level <= current_list.metadata.get('max_indent_level', 0) + 1)
     
-    def _extract_document_title(self, sentences: List[StructuredSentence]) -> str:
-        """文書タイトルを抽出
-        
-        Args:
-            sentences: 文のリスト
-            
-        Returns:
-            文書タイトル
-        """
-        # 最初の見出しを文書タイトルとして使用
-        for sentence in sentences:
-            if sentence.structure_info == 'header':
-                return self._clean_header_text(sentence.text)
-        
-        # 見出しがない場合は空文字
-        return ''
-    
     def _extract_header_level(self, structure_info: str) -> int:
         """見出しレベルを抽出
         
@@ -361,7 +401,7 @@ class SemanticDocumentParser:
         """
         # 構造情報から見出しレベルを抽出
         if 'header_level' in structure_info:
-            level_match = re.search(r'header_level_(\d+)', structure_info)
+            level_match = _RE_HEADER_LEVEL.search(structure_info)
             if level_match:
                 return min(int(level_match.group(1)), self.config.max_header_level)
         
@@ -376,12 +416,10 @@ class SemanticDocumentParser:
         Returns:
             見出しスタイル
         """
-        if re.match(r'^#+\s+', text):
-            return 'markdown'
-        elif re.match(r'^\d+\.\s+', text):
-            return 'numbered'
-        else:
+        match = _RE_HEADER_STYLE.match(text)
+        if match is None:
             return 'plain'
+        return 'markdown' if match.group('markdown') else 'numbered'
     
     def _extract_list_type(self, text: str) -> str:
         """リストタイプを抽出
@@ -392,15 +430,11 @@ class SemanticDocumentParser:
         Returns:
             リストタイプ ('ordered' or 'unordered')
         """
-        # 番号付きリストの判定
-        if re.match(r'^\s*\d+\.\s+', text):
+        # 番号付きリストの判定（それ以外は順序なしリスト）
+        if _RE_ORDERED_ITEM.match(text):
             return 'ordered'
         
-        # 順序なしリストの判定
-        if re.match(r'^\s*[-*+]\s+', text):
-            return 'unordered'
-        
-        return 'unordered'  # デフォルト
+        return 'unordered'
     
     def _extract_item_number(self, text: str) -> int:
         """リストアイテム番号を抽出
@@ -411,7 +445,7 @@ class SemanticDocumentParser:
         Returns:
             アイテム番号
         """
-        match = re.match(r'^\s*(\d+)\.\s+', text)
+        match = _RE_ORDERED_ITEM.match(text)
         if match:
             return int(match.group(1))
         
@@ -426,7 +460,7 @@ class SemanticDocumentParser:
         Returns:
             元のインデント文字列
         """
-        match = re.match(r'^(\s*)', text)
+        match = _RE_LEADING_SPACE.match(text)
         if match:
             return match.group(1)
         
@@ -441,14 +475,8 @@ class SemanticDocumentParser:
         Returns:
             クリーンアップされたテキスト
         """
-        # Markdown記号を除去
-        text = re.sub(r'^#+\s*', '', text)
-        # 番号を除去
-        text = re.sub(r'^\d+\.\s*', '', text)
-        # 前後の空白を除去
-        text = text.strip()
-        
-        return text
+        # Markdown記号と番号を一度の置換で除去し、前後の空白を除去
+        return _RE_HEADER_PREFIX.sub('', text, count=1).strip()
     
     def _clean_list_item_text(self, text: str) -> str:
         """リストアイテムテキストをクリーンアップ
@@ -459,13 +487,8 @@ class SemanticDocumentParser:
         Returns:
             クリーンアップされたテキスト
         """
-        # リストマーカーを除去
-        text = re.sub(r'^\s*[-*+]\s*', '', text)
-        text = re.sub(r'^\s*\d+\.\s*', '', text)
-        # 前後の空白を除去
-        text = text.strip()
-        
-        return text
+        # リストマーカーを一度の置換で除去し、前後の空白を除去
+        return _RE_LIST_MARKER.sub('', text, count=1).strip()
     
     def _combine_paragraph_sentences(self, sentences: List[StructuredSentence]) -> str:
         """段落文を結合
@@ -480,11 +503,7 @@ class SemanticDocumentParser:
             return ''
         
         # 文を結合し、改行を保持
-        combined_text = []
-        for sentence in sentences:
-            combined_text.append(sentence.text.strip())
-        
-        return '\n'.join(combined_text)
+        return '\n'.join([sentence.text.strip() for sentence in sentences])
     
     def _extract_line_breaks(self, sentences: List[StructuredSentence]) -> List[int]:
         """改行位置を抽出
@@ -495,12 +514,7 @@ class SemanticDocumentParser:
         Returns:
             改行位置のリスト
         """
-        line_breaks = []
-        for sentence in sentences:
-            if '\n' in sentence.text:
-                line_breaks.append(sentence.line_number)
-        
-        return line_breaks
+        return [sentence.line_number for sentence in sentences if '\n' in sentence.text]
     
     def _add_section_to_document(self, document_node: DocumentNode, section_node: DocumentNode):
         """セクションを文書に追加
@@ -523,6 +537,7 @@ class SemanticDocumentParser:
         
         # セクションスタックに追加
         self._current_section_stack.append(section_node)
+        self._current_section_levels.append(header_level)
     
     def _add_list_item_to_context(self, list_item_node: DocumentNode, document_node: DocumentNode):
         """リストアイテムを適切なコンテキストに追加
@@ -537,11 +552,15 @@ class SemanticDocumentParser:
         # 適切なリストノードを検索または作成
         current_list = self._find_or_create_list_node(list_type, indent_level)
         
+        # リストはここでのみ子ノードを持つため、子ノードがなければ新規作成されたリスト
+        # （子ノードリストの線形探索による所属判定を行わない）
+        is_new_list = not current_list.children
+        
         # リストアイテムを追加
         current_list.add_child(list_item_node)
         
         # 現在のコンテキストにリストを追加（初回のみ）
-        if current_list not in self._get_current_context_children():
+        if is_new_list:
             self._add_node_to_current_context(current_list)
     
     def _add_node_to_current_context(self, node: DocumentNode):
@@ -566,12 +585,13 @@ class SemanticDocumentParser:
             new_header_level: 新しい見出しレベル
         """
         # 新しいレベル以上のセクションをスタックから削除
-        while (self._current_section_stack and 
-               self._current_section_stack[-1].metadata.get('header_level', 1) >= new_header_level):
+        section_levels = self._current_section_levels
+        while section_levels and section_levels[-1] >= new_header_level:
+            section_levels.pop()
             self._current_section_stack.pop()
         
-        # リストスタックもクリア（新しいセクションではリストは継続しない）
-        self._current_list_stack = []
+        # リストもクリア（新しいセクションではリストは継続しない）
+        self._current_list_map.clear()
     
     def _find_or_create_list_node(self, list_type: str, indent_level: int) -> DocumentNode:
         """適切なリストノードを検索または作成
@@ -583,46 +603,35 @@ class SemanticDocumentParser:
         Returns:
             リストノード
         """
-        # 現在のリストスタックから適切なリストを検索
-        for list_node in reversed(self._current_list_stack):
-            if (list_node.metadata.get('list_type') == list_type and 
-                list_node.metadata.get('indent_level', 0) == indent_level):
-                return list_node
+        # 現在のコンテキストから適切なリストを検索
+        key = (list_type, indent_level)
+        list_node = self._current_list_map.get(key)
+        if list_node is not None:
+            return list_node
         
         # 適切なリストが見つからない場合は新しく作成
         new_list = self._create_list_node(list_type)
         new_list.metadata['indent_level'] = indent_level
         
-        # リストスタックに追加
-        self._current_list_stack.append(new_list)
+        # リストの対応表に追加
+        self._current_list_map[key] = new_list
         
         return new_list
     
-    def _get_current_context_children(self) -> List[DocumentNode]:
-        """現在のコンテキストの子ノードを取得
-        
-        Returns:
-            現在のコンテキストの子ノードリスト
-        """
-        if self._current_section_stack:
-            return self._current_section_stack[-1].children
-        else:
-            return []  # 文書レベルの場合は別途処理が必要
-    
-    def _log_error(self, message: str) -> None:
+    def _log_error(self, message: str, *args: Any) -> None:
         """エラーログの出力
         
         Args:
-            message: エラーメッセージ
+            message: エラーメッセージ（% 形式の書式）
+            *args: 書式の引数（ログレベルが有効な場合のみ展開される）
         """
-        # 実際の実装では適切なロガーを使用
-        print(f"SemanticParser ERROR: {message}")
+        _logger.error(message, *args)
     
-    def _log_warning(self, message: str) -> None:
+    def _log_warning(self, message: str, *args: Any) -> None:
         """警告ログの出力
         
         Args:
-            message: 警告メッセージ
+            message: 警告メッセージ（% 形式の書式）
+            *args: 書式の引数（ログレベルが有効な場合のみ展開される）
         """
-        # 実際の実装では適切なロガーを使用
-        print(f"SemanticParser WARNING: {message}")
\ No newline at end of file
+        _logger.warning(message, *args)
\ No newline at end of file
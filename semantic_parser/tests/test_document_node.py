@@ -5,6 +5,12 @@ DocumentNodeクラスの基本機能テスト
 Day 3-4: フォーマット復元機能の改良に対応する追加テストケース
 """
 
+import copy
+import dataclasses
+import io
+import json
+import pickle
+
 import pytest
 from semantic_parser.core.document_node import DocumentNode, FormatConfig
 
@@ -120,6 +126,21 @@ class TestDocumentNode:
         assert len(paragraphs) == 1
         assert paragraphs[0] == paragraph
     
+    def test_find_children_by_type_deep_nesting(self):
+        """再帰上限を超える深さのネストでの子ノード検索テスト"""
+        root = DocumentNode(node_type='document', content='ルート')
+        current = root
+        for i in range(5000):
+            child = DocumentNode(node_type='section', content=f'レベル{i}')
+            current.add_child(child)
+            current = child
+        
+        sections = root.find_children_by_type('section')
+        
+        assert len(sections) == 5000
+        assert sections[0].content == 'レベル0'
+        assert sections[-1] is current
+    
     def test_get_text_length(self):
         """テキスト長取得テスト"""
         parent = DocumentNode(
@@ -136,6 +157,95 @@ class TestDocumentNode:
         
         assert parent.get_text_length() == 11  # 6 + 5
     
+    def test_get_text_length_deep_nesting(self):
+        """再帰上限を超える深さのネストでのテキスト長取得テスト"""
+        root = DocumentNode(node_type='document', content='ルート')  # 3文字
+        current = root
+        for i in range(5000):
+            child = DocumentNode(node_type='section', content='節')  # 1文字
+            current.add_child(child)
+            current = child
+        
+        assert root.get_text_length() == 5003
+    
+    def test_get_text_length_cache_invalidation(self):
+        """子ノード追加時のテキスト長キャッシュ無効化テスト"""
+        root = DocumentNode(node_type='document', content='ルート')  # 3文字
+        section = DocumentNode(node_type='section', content='節')  # 1文字
+        root.add_child(section)
+        
+        assert root.get_text_length() == 4
+        
+        # 孫ノードの追加が祖先のキャッシュにも反映される
+        section.add_child(DocumentNode(node_type='paragraph', content='段落'))  # 2文字
+        
+        assert section.get_text_length() == 3
+        assert root.get_text_length() == 6
+    
+    def test_get_text_length_cache_invalidation_constructor_children(self):
+        """コンストラクタで渡した子ノード配下の追加がキャッシュに反映されることのテスト"""
+        child = DocumentNode(node_type='section', content='節')  # 1文字
+        parent = DocumentNode(node_type='document', content='文', children=[child])  # 1文字
+        
+        assert parent.get_text_length() == 2
+        
+        child.add_child(DocumentNode(node_type='paragraph', content='xyz'))  # 3文字
+        
+        assert parent.get_text_length() == 5
+    
+    def test_get_text_length_cache_invalidation_after_shallow_copy(self):
+        """浅いコピー後も複製元のキャッシュが無効化されることのテスト"""
+        root = DocumentNode(node_type='document', content='文')  # 1文字
+        section = DocumentNode(node_type='section', content='節')  # 1文字
+        root.add_child(section)
+        assert root.get_text_length() == 2
+        
+        copied = copy.copy(root)
+        section.add_child(DocumentNode(node_type='paragraph', content='xyz'))  # 3文字
+        
+        assert copied.children is root.children
+        assert root.get_text_length() == 5
+    
+    def test_pickle_round_trip(self):
+        """子ノードを持つ木の pickle 往復テスト"""
+        root = DocumentNode(node_type='document', content='ルート')  # 3文字
+        section = DocumentNode(node_type='section', content='節')  # 1文字
+        root.add_child(section)
+        assert root.get_text_length() == 4
+        
+        restored = pickle.loads(pickle.dumps(root))
+        
+        assert restored == root
+        # 復元後も親参照が張り直され、孫ノードの追加が祖先のキャッシュに反映される
+        restored.children[0].add_child(DocumentNode(node_type='paragraph', content='段落'))
+        assert restored.get_text_length() == 6
+    
+    def test_deepcopy_is_independent(self):
+        """deepcopy した木の変更が複製元のキャッシュに影響しないことのテスト"""
+        root = DocumentNode(node_type='document', content='ルート')  # 3文字
+        root.add_child(DocumentNode(node_type='section', content='節'))  # 1文字
+        assert root.get_text_length() == 4
+        
+        copied = copy.deepcopy(root)
+        assert copied.get_text_length() == 4
+        copied.children[0].add_child(DocumentNode(node_type='paragraph', content='段落'))
+        
+        assert copied.get_text_length() == 6
+        assert root.get_text_length() == 4
+        assert len(root.children[0].children) == 0
+    
+    def test_asdict_excludes_internal_state(self):
+        """dataclasses.asdict に内部のキャッシュ・親参照が含まれないことのテスト"""
+        root = DocumentNode(node_type='document', content='ルート')
+        root.add_child(DocumentNode(node_type='section', content='節'))
+        root.get_text_length()
+        
+        data = dataclasses.asdict(root)
+        
+        assert '_cached_length' not in data
+        assert '_parent' not in data
+        assert '_cached_length' not in data['children'][0]
+    
     def test_to_dict(self):
         """辞書変換テスト"""
         parent = DocumentNode(
@@ -166,6 +276,34 @@ class TestDocumentNode:
         assert dict_result['children'][0]['node_type'] == 'paragraph'
         assert dict_result['text_length'] == 9  # 親5文字 + 子3文字
     
+    def test_to_dict_deep_nesting(self):
+        """再帰上限を超える深さのネストでの辞書変換テスト"""
+        root = DocumentNode(node_type='document', content='ルート')  # 3文字
+        current = root
+        for i in range(5000):
+            child = DocumentNode(node_type='section', content='節')  # 1文字
+            current.add_child(child)
+            current = child
+        
+        dict_result = root.to_dict()
+        
+        assert dict_result['text_length'] == 5003
+        assert dict_result['children'][0]['text_length'] == 5000
+        assert dict_result['children'][0]['children'][0]['content'] == '節'
+    
+    def test_to_json_matches_to_dict(self):
+        """JSONストリーム出力テスト"""
+        parent = DocumentNode(node_type='section', content='親セクション', start_line=1, end_line=5)
+        parent.metadata['header_level'] = 2
+        parent.add_child(DocumentNode(node_type='paragraph', content='子段落"引用"', start_line=3, end_line=4))
+        parent.add_child(DocumentNode(node_type='list', content=''))
+        
+        for ensure_ascii in (False, True):
+            out = io.StringIO()
+            parent.to_json(out, ensure_ascii=ensure_ascii)
+            
+            assert out.getvalue() == json.dumps(parent.to_dict(), ensure_ascii=ensure_ascii)
+    
     def test_to_text_paragraph(self):
         """段落のテキストフォーマットテスト"""
         node = DocumentNode(
@@ -504,7 +642,7 @@ class TestAdvancedFormatting:
 class TestErrorHandling:
     """エラーハンドリングのテストケース（Day 3-4追加）"""
 
-    def test_unknown_node_type_warning(self, capsys):
+    def test_unknown_node_type_warning(self, caplog):
         """不明なノードタイプでの警告テスト"""
         node = DocumentNode(
             node_type='unknown_type',
@@ -513,9 +651,11 @@ class TestErrorHandling:
         
         result = node.to_text()
         
-        # 警告が出力されることを確認
-        captured = capsys.readouterr()
-        assert 'WARNING: 不明なノードタイプ: unknown_type' in captured.out
+        # 警告がロガーへ出力されることを確認
+        assert any(
+            record.levelname == 'WARNING' and record.getMessage() == '不明なノードタイプ: unknown_type'
+            for record in caplog.records
+        )
         
         # コンテンツは返される
         assert result == '不明なタイプ'
@@ -537,6 +677,16 @@ class TestErrorHandling:
         
         # エラー時はコンテンツがそのまま返される
         assert result == 'テストコンテンツ'
+    
+    def test_paragraph_format_override_is_used(self):
+        """差し替えた _format_paragraph がデフォルト設定でも呼ばれることのテスト"""
+        class UpperParagraphNode(DocumentNode):
+            def _format_paragraph(self, preserve_formatting, format_config):
+                return self.content.upper()
+        
+        node = UpperParagraphNode(node_type='paragraph', content='text')
+        
+        assert node.to_text() == 'TEXT'
 
     def test_empty_content_handling(self):
         """空のコンテンツの処理テスト"""
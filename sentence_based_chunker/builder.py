@@ -2,30 +2,60 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List
+from itertools import compress
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
 from dataclasses import dataclass, field
 
 
-@dataclass
-class Chunk:
-    """チャンクを構成する文の集合"""
+class _TextCache:
+    """結合テキストのキャッシュ用スロット
+
+    dataclass のフィールドにすると asdict・astuple に含まれるため、基底クラスのスロットに置く。
+    """
+
+    __slots__ = ("_text",)
+
+
+@dataclass(slots=True)
+class Chunk(_TextCache):
+    """チャンクを構成する文の集合
+
+    ``text`` は初回参照時に結合した結果をキャッシュする。
+    参照後に ``sentences`` を変更する場合は新しい ``Chunk`` を作成すること。
+    """
 
     sentences: List[str] = field(default_factory=list)
 
+    def __post_init__(self) -> None:
+        self._text: Optional[str] = None
+
     @property
     def text(self) -> str:
-        return "".join(self.sentences)
-
-
-def build_chunks(sentences: Iterable[str], boundaries: Iterable[bool], cfg) -> List[Chunk]:
-    """境界フラグに従い sentences をチャンクにまとめる"""
-    current: List[str] = []
-    result: List[Chunk] = []
-    for sent, boundary in zip(sentences, boundaries):
-        current.append(sent)
-        if boundary:
-            result.append(Chunk(sentences=current))
-            current = []
-    if current:
-        result.append(Chunk(sentences=current))
-    return result
\ No newline at end of file
+        if self._text is None:
+            self._text = "".join(self.sentences)
+        return self._text
+
+    def to_record(self) -> Dict[str, Any]:
+        """出力用のレコード（JSONL の1行分）を返す"""
+        return {"text": self.text, "sentences": self.sentences}
+
+
+def build_chunks(sentences: Iterable[str], boundaries: Iterable[bool], cfg) -> Iterator[Chunk]:
+    """境界フラグに従い sentences をチャンクにまとめる
+
+    境界フラグが True の文の直後で区切る。文と境界フラグの数が異なる場合は
+    短い方に合わせる。チャンクは確定した順に逐次 yield する。
+    """
+    if not isinstance(sentences, list):
+        sentences = list(sentences)
+    if not isinstance(boundaries, Sequence):
+        boundaries = list(boundaries)
+    n = min(len(sentences), len(boundaries))
+
+    # 境界の直後の位置を求め、文を1つずつ追加せずスライスでチャンクを切り出す
+    start = 0
+    for end in compress(range(1, n + 1), boundaries):
+        yield Chunk(sentences=sentences[start:end])
+        start = end
+    if start < n:
+        yield Chunk(sentences=sentences[start:n])
\ No newline at end of file
@@ -1,6 +1,5 @@
 import asyncio
 import pathlib
-import sys
 from typing import Optional
 
 import typer
@@ -21,27 +20,27 @@ async def async_run(
     # 文リスト生成 (ストリームで2回利用するためリスト化)
     sentences = list(preprocess.stream_sentences(input_path))
 
-    # ベクトル生成
-    embeddings = emb_mod.embed_stream(sentences, cfg)
+    # ベクトル生成（バッチごとの行列を1つの埋め込み行列にまとめる）
+    embeddings = emb_mod.embed_matrix(sentences, cfg)
 
     # 境界判定
     if cfg.detector.use_llm_review:
         # LLM精査を使用する場合は非同期版を使用
         from .provider_router import ProviderRouter
         router = ProviderRouter(cfg)
-        boundaries = await det_mod.detect_boundaries_async(
-            embeddings, sentences, cfg, router, use_llm_review=True
-        )
+        try:
+            boundaries = await det_mod.detect_boundaries_async(
+                embeddings, sentences, cfg, router, use_llm_review=True
+            )
+        finally:
+            await router.aclose()
     else:
         # LLM精査を使用しない場合は同期版を使用
         boundaries = list(det_mod.detect_boundaries(embeddings, cfg))
 
-    # チャンク構築
-    chunks = builder_mod.build_chunks(sentences, boundaries, cfg)
-
-    # 出力
+    # チャンク構築と出力（チャンクを確定した順に逐次書き出す）
     out_path = output or input_path.with_suffix(".chunks.jsonl")
-    writer_mod.write_chunks(out_path, chunks)
+    writer_mod.write_chunks(out_path, builder_mod.build_chunks(sentences, boundaries, cfg))
     return out_path
 
 
@@ -58,35 +57,17 @@ def run(
         if force_remote:
             cfg.llm.provider = "remote"
 
-        # 非同期処理が必要な場合は async_run を使用
-        if cfg.detector.use_llm_review:
-            out_path = asyncio.run(async_run(input_path, cfg, output))
-        else:
-            # 同期処理のみの場合は従来通り
-            # 文リスト生成 (ストリームで2回利用するためリスト化)
-            sentences = list(preprocess.stream_sentences(input_path))
-
-            # ベクトル生成
-            embeddings = emb_mod.embed_stream(sentences, cfg)
-
-            # 境界判定
-            boundaries = list(det_mod.detect_boundaries(embeddings, cfg))
-
-            # チャンク構築
-            chunks = builder_mod.build_chunks(sentences, boundaries, cfg)
-
-            # 出力
-            out_path = output or input_path.with_suffix(".chunks.jsonl")
-            writer_mod.write_chunks(out_path, chunks)
+        # LLM精査の有無は async_run 内で切り替えるため、処理経路は一本にまとめる
+        out_path = asyncio.run(async_run(input_path, cfg, output))
 
         typer.echo(f"書き込み完了: {out_path}")
     except SentenceBasedChunkerError as e:
         typer.echo(f"エラー: {e}", err=True)
-        sys.exit(1)
+        raise typer.Exit(code=1)
     except Exception as e:  # pylint: disable=broad-except
         # 予期しないエラー
         typer.echo(f"予期しないエラーが発生しました: {e}", err=True)
-        sys.exit(1)
+        raise typer.Exit(code=1)
 
 
 @app.command()
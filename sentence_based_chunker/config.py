@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import functools
+import json
 import pathlib
 from typing import Literal, Optional
 
@@ -9,16 +11,33 @@ import yaml
 from pydantic import BaseModel, Field
 from .exceptions import ConfigLoadError
 
+try:  # Python 3.11 以降の標準ライブラリ
+    import tomllib
+except ImportError:  # pragma: no cover
+    tomllib = None
+
 
 class RuntimeConfig(BaseModel):
     device: str = Field("cpu", description="mps / cpu / cuda")
     batch_size: int = 32
     llm_concurrency: int = 1
+    precision: Literal["fp32", "fp16", "bf16", "int8"] = Field(
+        "fp32", description="埋め込みモデルの精度（fp16 / bf16 は GPU、int8 は CPU のみ）"
+    )
+    backend: Literal["torch", "onnx"] = Field(
+        "torch", description="埋め込みモデルの推論バックエンド（onnx は sentence-transformers>=3.2 と optimum が必要）"
+    )
+    fast_attention: bool = Field(
+        False, description="torch バックエンドで SDPA（融合アテンション）を有効にする"
+    )
 
 
 class LocalLLMConfig(BaseModel):
     model_path: str
     server_url: str = "http://127.0.0.1:8000"
+    batch_votes: bool = Field(
+        False, description="Stage C の投票を n パラメータで1リクエストにまとめる（サーバーが n に対応している場合）"
+    )
 
 
 class RemoteLLMConfig(BaseModel):
@@ -73,19 +92,37 @@ class Config(BaseModel):
 #  public helpers
 # ------------------------------------------------------------
 
-def load_config(path: pathlib.Path | str) -> Config:
-    """YAML ファイルを読み込み Config オブジェクトを返す。
+# C 実装のローダーが利用可能ならそちらを使う（純 Python 版より高速）
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
-    何らかの理由で読み込みに失敗した場合は ``ConfigLoadError`` を送出する。
-    """
-    path = pathlib.Path(path)
+_TOML_ERRORS = (tomllib.TOMLDecodeError,) if tomllib is not None else ()
+
+
+@functools.lru_cache(maxsize=32)
+def _load_cached(path_str: str, mtime_ns: int) -> Config:
+    """パスと更新時刻をキーに、解析・バリデーション済みの Config を保持する。"""
+    suffix = pathlib.PurePath(path_str).suffix.lower()
+    if suffix == ".toml" and tomllib is None:
+        raise ConfigLoadError("TOML 形式の設定ファイルには Python 3.11 以降が必要です")
     try:
-        with path.open("r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        # 拡張子で形式を判別し、それ以外は従来どおり YAML として読み込む
+        if suffix == ".json":
+            with open(path_str, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        elif suffix == ".toml":
+            with open(path_str, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            with open(path_str, "r", encoding="utf-8") as f:
+                data = yaml.load(f, Loader=_YAML_LOADER)
     except FileNotFoundError as e:
-        raise ConfigLoadError(f"設定ファイルが見つかりません: {path}") from e
+        raise ConfigLoadError(f"設定ファイルが見つかりません: {path_str}") from e
     except yaml.YAMLError as e:
         raise ConfigLoadError(f"YAML の解析に失敗しました: {e}") from e
+    except json.JSONDecodeError as e:
+        raise ConfigLoadError(f"JSON の解析に失敗しました: {e}") from e
+    except _TOML_ERRORS as e:
+        raise ConfigLoadError(f"TOML の解析に失敗しました: {e}") from e
     except Exception as e:  # pylint: disable=broad-except
         raise ConfigLoadError(f"設定ファイルの読み込み中に予期せぬエラーが発生しました: {e}") from e
 
@@ -93,4 +130,24 @@ def load_config(path: pathlib.Path | str) -> Config:
     try:
         return Config.model_validate(data)
     except Exception as e:  # pylint: disable=broad-except
-        raise ConfigLoadError(f"設定値のバリデーションに失敗しました: {e}") from e
\ No newline at end of file
+        raise ConfigLoadError(f"設定値のバリデーションに失敗しました: {e}") from e
+
+
+def load_config(path: pathlib.Path | str) -> Config:
+    """設定ファイルを読み込み Config オブジェクトを返す。
+
+    拡張子が ``.json`` なら JSON、``.toml`` なら TOML、それ以外は YAML として読み込む。
+    同じファイルが更新されていなければ前回の解析結果を再利用する。
+    呼び出し側が設定を書き換えてもキャッシュに影響しないよう、常に複製を返す。
+    何らかの理由で読み込みに失敗した場合は ``ConfigLoadError`` を送出する。
+    """
+    path = pathlib.Path(path)
+    try:
+        resolved = path.resolve()
+        mtime_ns = resolved.stat().st_mtime_ns
+    except FileNotFoundError as e:
+        raise ConfigLoadError(f"設定ファイルが見つかりません: {path}") from e
+    except Exception as e:  # pylint: disable=broad-except
+        raise ConfigLoadError(f"設定ファイルの読み込み中に予期せぬエラーが発生しました: {e}") from e
+
+    return _load_cached(str(resolved), mtime_ns).model_copy(deep=True)
@@ -2,70 +2,114 @@
 
 from __future__ import annotations
 
+import asyncio
 from typing import Generator, Iterable, List, TYPE_CHECKING, Optional
 
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from numpy.lib.stride_tricks import sliding_window_view
 
 from .config import Config
 
+# SimSIMD は任意依存。未導入の場合は NumPy（einsum）で計算する
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
 # 遅延評価の型ヒント用途。実行時に未使用のため lint エラーを回避
 if TYPE_CHECKING:
     from .provider_router import ProviderRouter
 
 
+# ------------------------------------------------------------
+# 隣接文の類似度（Stage A/B で共用）
+# ------------------------------------------------------------
+
+def _compute_sims(embeddings: List[np.ndarray] | np.ndarray) -> np.ndarray:
+    """隣接する文の埋め込み同士のコサイン類似度（長さ N-1）を返す
+
+    行ごとの内積で一括計算する（float32 かつ SimSIMD 導入済みなら SimSIMD を使用）。
+    cosine_similarity と同様に、ノルム 0 のベクトルとの類似度は 0 とする。
+    """
+    if len(embeddings) < 2:
+        return np.empty(0)
+    E = embeddings if isinstance(embeddings, np.ndarray) else np.stack(embeddings)
+    if simsimd is not None and E.dtype == np.float32:
+        # float32（embed_stream の出力）は SimSIMD の SIMD カーネルで隣接行をまとめて計算
+        E = np.ascontiguousarray(E)
+        sims = 1.0 - np.asarray(simsimd.cosine(E[:-1], E[1:]))
+        # SimSIMD はゼロベクトル同士を距離 0 とするため、ノルム 0 を含む組は類似度 0 に揃える
+        zero = ~E.any(axis=1)
+        if zero.any():
+            sims[zero[:-1] | zero[1:]] = 0.0
+        return sims
+    norms = np.linalg.norm(E, axis=1)
+    norms[norms == 0.0] = 1.0
+    return np.einsum("ij,ij->i", E[:-1], E[1:]) / (norms[:-1] * norms[1:])
+
+
 # ------------------------------------------------------------
 # A. Embedding スコア基準
 # ------------------------------------------------------------
 
-def _stage_a(embeddings: List[np.ndarray], θ_high: float, θ_low: float) -> List[bool]:
-    results: List[bool] = []
-    for i in range(1, len(embeddings)):
-        sim = float(cosine_similarity(embeddings[i - 1 : i], embeddings[i : i + 1])[0][0])
-        results.append(bool(sim < θ_low))  # bool 化して型警告を抑制
-    results.insert(0, False)  # 先頭は境界無し
-    return results
+def _stage_a(sims: np.ndarray, θ_high: float, θ_low: float) -> List[bool]:
+    return [False] + (sims < θ_low).tolist()  # 先頭は境界無し
 
 
 # ------------------------------------------------------------
 # B. Window アノマリー
 # ------------------------------------------------------------
 
-def _moving_average(data: List[float], k: int) -> List[float]:
-    ret = []
-    window = []
-    for d in data:
-        window.append(d)
-        if len(window) > k:
-            window.pop(0)
-        ret.append(float(np.mean(window)))
-    return ret
+def _moving_average(data: np.ndarray, k: int) -> np.ndarray:
+    """直近 k 件（先頭付近はそれまでの全件）の移動平均"""
+    head = [np.mean(data[: i + 1]) for i in range(min(k - 1, len(data)))]
+    if len(data) < k:
+        return np.array(head, dtype=np.float64)
+    # 窓が揃う位置以降は窓ごとの平均をまとめて計算する（累積和の差と違い誤差が蓄積しない）
+    return np.concatenate((np.array(head, dtype=np.float64), sliding_window_view(data, k).mean(axis=1)))
 
 
-def _stage_b(embeddings: List[np.ndarray], k: int, τ: float) -> List[bool]:
-    # 連続コサインで異常スコア
-    sims = [float(cosine_similarity(embeddings[i : i + 1], embeddings[i + 1 : i + 2])[0][0]) for i in range(len(embeddings) - 1)]
-    sims.insert(0, 1.0)
+def _stage_b(sims: np.ndarray, k: int, τ: float) -> List[bool]:
+    # 連続コサインで異常スコア（先頭は比較対象が無いため類似度 1.0 とみなす）
+    sims = np.concatenate(([1.0], sims.astype(np.float64, copy=False)))
     avg = _moving_average(sims, k)
-    resid = [abs(s - a) for s, a in zip(sims, avg)]
-    sigma = np.std(resid)
-    results = [bool(r > τ * sigma) for r in resid]
-    return results
+    resid = np.abs(sims - avg)
+    sigma = resid.std()
+    return (resid > τ * sigma).tolist()
 
 
 # ------------------------------------------------------------
 # C. LLM 精査 stage
 # ------------------------------------------------------------
 async def _stage_c(sentences: List[str], prelim: List[bool], router: "ProviderRouter", n_vote: int) -> List[bool]:
-    refined = prelim.copy()
-    for idx, is_boundary in enumerate(prelim):
-        if not is_boundary:
-            continue
+    """境界候補ごとに n_vote 回 LLM に問い合わせ、過半数が yes の候補のみ境界とする
+
+    全候補・全投票の問い合わせをまとめて発行し、同時実行数は ``router.concurrency`` に制限する。
+    ``router.batch_votes`` が有効な場合は、候補ごとに n_vote 件の応答を1リクエストで取得する。
+    """
+    candidates = [idx for idx, is_boundary in enumerate(prelim) if is_boundary]
+    if not candidates:
+        return prelim.copy()
+
+    sem = asyncio.Semaphore(max(1, router.concurrency))
+    per_request = n_vote if router.batch_votes and n_vote > 1 else 1
+
+    async def ask(prompt: str) -> List[str]:
+        async with sem:
+            if per_request == 1:
+                return [await router.call(prompt)]
+            return await router.call_n(prompt, per_request)
+
+    tasks = []
+    for idx in candidates:
         prompt = f"次の2文は異なるトピックか？ yes/no\n-----\n{sentences[idx]}\n-----\n{sentences[idx+1] if idx+1 < len(sentences) else ''}"
-        votes = 0
-        for _ in range(n_vote):
-            ans = await router.call(prompt)
-            votes += 1 if "yes" in ans.lower() else 0
+        tasks.extend(ask(prompt) for _ in range(n_vote // per_request))
+    answers = [ans for row in await asyncio.gather(*tasks) for ans in row]
+
+    refined = prelim.copy()
+    for pos, idx in enumerate(candidates):
+        row = answers[pos * n_vote:(pos + 1) * n_vote]
+        votes = sum("yes" in ans.lower() for ans in row)
         refined[idx] = votes > n_vote // 2
     return refined
 
@@ -87,13 +131,14 @@ def _stage_d(sentences: List[str], boundaries: List[bool]) -> List[bool]:
 # public API
 # ------------------------------------------------------------
 
-def detect_boundaries(embeddings: Iterable[np.ndarray], cfg: Config) -> Generator[bool, None, None]:
-    """埋め込みストリームを受け取り、境界判定結果をストリームで返す（同期版）"""
-    emb_list: List[np.ndarray] = list(embeddings)
+def detect_boundaries(embeddings: Iterable[np.ndarray] | np.ndarray, cfg: Config) -> Generator[bool, None, None]:
+    """埋め込みストリーム（または埋め込み行列）を受け取り、境界判定結果をストリームで返す（同期版）"""
+    emb_list = embeddings if isinstance(embeddings, np.ndarray) else list(embeddings)
 
-    # Stage A/B (同期)
-    a_flags = _stage_a(emb_list, θ_high=cfg.detector.θ_high, θ_low=cfg.detector.θ_low)  # type: ignore[attr-defined]
-    b_flags = _stage_b(emb_list, k=cfg.detector.k, τ=cfg.detector.τ)  # type: ignore[attr-defined]
+    # Stage A/B (同期) - 隣接文の類似度は一度だけ計算して両ステージで共用
+    sims = _compute_sims(emb_list)
+    a_flags = _stage_a(sims, θ_high=cfg.detector.θ_high, θ_low=cfg.detector.θ_low)  # type: ignore[attr-defined]
+    b_flags = _stage_b(sims, k=cfg.detector.k, τ=cfg.detector.τ)  # type: ignore[attr-defined]
 
     final_flags = [a or b for a, b in zip(a_flags, b_flags)]
 
@@ -102,7 +147,7 @@ def detect_boundaries(embeddings: Iterable[np.ndarray], cfg: Config) -> Generato
 
 
 async def detect_boundaries_async(
-    embeddings: Iterable[np.ndarray], 
+    embeddings: Iterable[np.ndarray] | np.ndarray, 
     sentences: List[str], 
     cfg: Config, 
     router: Optional["ProviderRouter"] = None,
@@ -111,7 +156,7 @@ async def detect_boundaries_async(
     """埋め込みストリームを受け取り、境界判定結果を返す（非同期版）
     
     Args:
-        embeddings: 埋め込みベクトルのIterable
+        embeddings: 埋め込みベクトルのIterable、または埋め込み行列 (N, D)
         sentences: 対応する文のリスト
         cfg: 設定
         router: LLMプロバイダルーター（Stage Cで使用）
@@ -120,11 +165,12 @@ async def detect_boundaries_async(
     Returns:
         境界判定結果のリスト
     """
-    emb_list: List[np.ndarray] = list(embeddings)
+    emb_list = embeddings if isinstance(embeddings, np.ndarray) else list(embeddings)
 
-    # Stage A/B (同期)
-    a_flags = _stage_a(emb_list, θ_high=cfg.detector.θ_high, θ_low=cfg.detector.θ_low)  # type: ignore[attr-defined]
-    b_flags = _stage_b(emb_list, k=cfg.detector.k, τ=cfg.detector.τ)  # type: ignore[attr-defined]
+    # Stage A/B (同期) - 隣接文の類似度は一度だけ計算して両ステージで共用
+    sims = _compute_sims(emb_list)
+    a_flags = _stage_a(sims, θ_high=cfg.detector.θ_high, θ_low=cfg.detector.θ_low)  # type: ignore[attr-defined]
+    b_flags = _stage_b(sims, k=cfg.detector.k, τ=cfg.detector.τ)  # type: ignore[attr-defined]
 
     prelim_flags = [a or b for a, b in zip(a_flags, b_flags)]
 
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import itertools
+import logging
 from typing import Generator, Iterable, List
 
 import numpy as np
@@ -13,19 +14,63 @@ from .config import Config
 from .exceptions import ModelLoadError, EmbeddingComputeError
 
 
+_logger = logging.getLogger(__name__)
+
+_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
 _model_cache: dict[str, SentenceTransformer] = {}
 
+# model.encode へ一度に渡す文数（batch_size の倍数）
+_BUCKET_FACTOR = 16
+
+
+def _apply_precision(model: SentenceTransformer, precision: str) -> SentenceTransformer:
+    """設定された精度に合わせてモデルを変換する"""
+    if precision == "int8":
+        # Linear 層の重みを int8 に動的量子化
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if precision == "fp16":
+        return model.half()
+    if precision == "bf16":
+        return model.to(dtype=torch.bfloat16)
+    return model
+
+
+def _load_model(device: str, backend: str, fast_attention: bool) -> SentenceTransformer:
+    """SentenceTransformer モデルを読み込む"""
+    if backend != "torch":
+        # backend 引数は sentence-transformers 3.2 以降のみ対応のため、既定値では渡さない
+        return SentenceTransformer(_MODEL_NAME, device=device, backend=backend)
+    if fast_attention:
+        try:
+            return SentenceTransformer(
+                _MODEL_NAME, device=device, model_kwargs={"attn_implementation": "sdpa"}
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            _logger.warning("SDPA を有効にできないため通常のアテンションで読み込みます: %s", e)
+    return SentenceTransformer(_MODEL_NAME, device=device)
 
-def _get_model(device: str) -> SentenceTransformer:
-    """デバイスに応じて SentenceTransformer モデルを取得/キャッシュ。
 
-    モデルロードに失敗した場合は ``ModelLoadError`` を送出する。
+def _get_model(
+    device: str, precision: str = "fp32", backend: str = "torch", fast_attention: bool = False
+) -> SentenceTransformer:
+    """デバイス・精度・バックエンドに応じて SentenceTransformer モデルを取得/キャッシュ。
+
+    モデルロードに失敗した場合、またはデバイスで使えない精度が指定された場合は
+    ``ModelLoadError`` を送出する。
     """
-    key = f"{device}"
+    key = f"{device}:{precision}:{backend}:{fast_attention}"
     if key not in _model_cache:
+        if precision == "int8" and device != "cpu":
+            raise ModelLoadError(f"int8 は CPU でのみ利用できます: device={device}")
+        if precision in ("fp16", "bf16") and device == "cpu":
+            raise ModelLoadError(f"{precision} は GPU (cuda / mps) でのみ利用できます")
+        if backend != "torch" and precision != "fp32":
+            # 精度変換は PyTorch モデルに対する処理のため、ONNX Runtime とは併用しない
+            raise ModelLoadError(f"{backend} バックエンドでは precision に fp32 を指定してください")
         try:
-            model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2", device=device)
-            _model_cache[key] = model
+            model = _load_model(device, backend, fast_attention)
+            _model_cache[key] = _apply_precision(model, precision)
         except Exception as e:  # pylint: disable=broad-except
             raise ModelLoadError(f"SentenceTransformer モデルのロードに失敗しました: {e}") from e
     return _model_cache[key]
@@ -41,21 +86,51 @@ def _batch_iterator(it: Iterable[str], batch_size: int) -> Iterable[List[str]]:
         yield batch
 
 
-def embed_stream(sentences: Iterable[str], cfg: Config) -> Generator[np.ndarray, None, None]:
-    """文ジェネレータを入力し、埋め込みをストリームで返す。
+def embed_stream_batched(sentences: Iterable[str], cfg: Config) -> Generator[np.ndarray, None, None]:
+    """文ジェネレータを入力し、埋め込みをバッチ単位の行列 (B, D) でストリームで返す。
+
+    文を ``batch_size`` の ``_BUCKET_FACTOR`` 倍ずつまとめて ``model.encode`` に渡す。
+    encode はまとめた文を長さ順に並べ替えて ``batch_size`` ごとに推論し、元の順序に
+    戻して返すため、長さの近い文同士でバッチが組まれパディングが減る。
+    その代わり、最初の埋め込みが返るまでにまとめた分の推論を待つ。
 
     埋め込み計算に失敗した場合は ``EmbeddingComputeError`` を送出する。
     """
-    device = cfg.runtime.device
-    batch_size = cfg.runtime.batch_size
+    runtime = cfg.runtime
+    device = runtime.device
+    batch_size = runtime.batch_size
 
-    model = _get_model(device)
+    model = _get_model(device, runtime.precision, runtime.backend, runtime.fast_attention)
 
-    for batch in _batch_iterator(sentences, batch_size):
+    for bucket in _batch_iterator(sentences, batch_size * _BUCKET_FACTOR):
         try:
             with torch.inference_mode():
-                vecs = model.encode(batch, device=device, convert_to_numpy=True, normalize_embeddings=True)
+                vecs = model.encode(
+                    bucket,
+                    batch_size=batch_size,
+                    device=device,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                )
+            # 半精度モデルの出力も後段の境界検出では float32 として扱う
+            vecs = np.ascontiguousarray(vecs, dtype=np.float32)
         except Exception as e:  # pylint: disable=broad-except
             raise EmbeddingComputeError(f"埋め込み計算に失敗しました: {e}") from e
-        for v in vecs:
-            yield v
\ No newline at end of file
+        yield vecs
+
+
+def embed_matrix(sentences: Iterable[str], cfg: Config) -> np.ndarray:
+    """全文の埋め込みを1つの行列 (N, D) として返す（文が無い場合は空の行列）"""
+    batches = list(embed_stream_batched(sentences, cfg))
+    if not batches:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.concatenate(batches, axis=0)
+
+
+def embed_stream(sentences: Iterable[str], cfg: Config) -> Generator[np.ndarray, None, None]:
+    """文ジェネレータを入力し、埋め込みを1文ずつストリームで返す（従来APIとの互換性を保持）
+
+    埋め込み計算に失敗した場合は ``EmbeddingComputeError`` を送出する。
+    """
+    for vecs in embed_stream_batched(sentences, cfg):
+        yield from vecs
@@ -4,37 +4,40 @@ from __future__ import annotations
 
 import json
 import pathlib
-from typing import List, Set
 
-from sklearn.metrics import f1_score
+import numpy as np
 
+# orjson は任意依存。未導入の場合は標準の json で読み込む
+try:
+    import orjson
 
-def _load_boundaries(path: pathlib.Path) -> Set[int]:
-    """chunks jsonl から boundary インデックス集合を抽出"""
-    indices: Set[int] = set()
-    idx = 0
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            rec = json.loads(line)
-            sent_len = len(rec["sentences"])
-            idx += sent_len
-            indices.add(idx)
-    return indices
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+def _load_boundaries(path: pathlib.Path) -> np.ndarray:
+    """chunks jsonl から boundary インデックス（昇順・重複なし）を抽出"""
+    with path.open("rb") as f:
+        lens = np.fromiter((len(_loads(line)["sentences"]) for line in f), dtype=np.int64)
+    # 文数 0 のチャンクがあると同じ位置が重複するため unique で除く
+    return np.unique(np.cumsum(lens))
 
 
 def evaluate(gold_dir: pathlib.Path, pred_dir: pathlib.Path) -> float:
     gold_files = sorted(gold_dir.glob("*.jsonl"))
     preds_files = [pred_dir / p.name for p in gold_files]
 
-    gold_labels: List[int] = []
-    pred_labels: List[int] = []
-
+    # 正解・予測いずれかに含まれる境界位置をサンプルとする二値 F1
+    tp = fp = fn = 0
     for g, p in zip(gold_files, preds_files):
-        g_set = _load_boundaries(g)
-        p_set = _load_boundaries(p)
-        all_idx = g_set.union(p_set)
-        for i in all_idx:
-            gold_labels.append(1 if i in g_set else 0)
-            pred_labels.append(1 if i in p_set else 0)
-
-    return f1_score(gold_labels, pred_labels)
\ No newline at end of file
+        g_idx = _load_boundaries(g)
+        p_idx = _load_boundaries(p)
+        hit = np.intersect1d(g_idx, p_idx, assume_unique=True).size
+        tp += hit
+        fp += p_idx.size - hit
+        fn += g_idx.size - hit
+
+    denom = 2 * tp + fp + fn
+    # 境界が1つも無い場合は sklearn の f1_score と同じく 0.0 とする
+    return 2 * tp / denom if denom else 0.0
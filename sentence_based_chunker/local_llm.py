@@ -4,7 +4,8 @@ from __future__ import annotations
 
 import asyncio
 import json
-from typing import Any, Dict
+import weakref
+from typing import Any, Dict, List
 
 import aiohttp
 
@@ -14,9 +15,30 @@ from .exceptions import LLMCallError
 # グローバルタイムアウトを明示する（linters の警告回避）
 _TIMEOUT = aiohttp.ClientTimeout(total=120)
 
+# イベントループごとに共有する ClientSession（キープアライブ接続を問い合わせ間で使い回す）
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
 
-async def _call_local(prompt: str, cfg: Config) -> str:
-    """非同期でローカル LLM サーバーに問い合わせる"""
+
+def _get_session(cfg: Config) -> aiohttp.ClientSession:
+    """実行中のイベントループに紐づく ClientSession を取得（未作成・クローズ済みなら作成）"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=cfg.runtime.llm_concurrency * 2, keepalive_timeout=60)
+        session = aiohttp.ClientSession(timeout=_TIMEOUT, connector=connector)
+        _sessions[loop] = session
+    return session
+
+
+async def aclose() -> None:
+    """実行中のイベントループで共有している ClientSession を閉じる"""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+async def _post_chat(prompt: str, cfg: Config, n: int) -> List[str]:
+    """チャット補完 API に1回問い合わせ、choices の応答本文を返す"""
     url = f"{cfg.llm.local.server_url}/v1/chat/completions"  # type: ignore[attr-defined]
     payload: Dict[str, Any] = {
         "model": "gemma-3n-e2b-it-text",
@@ -24,24 +46,50 @@ async def _call_local(prompt: str, cfg: Config) -> str:
         "max_tokens": 64,
         "temperature": 0,
     }
+    if n > 1:
+        payload["n"] = n
     try:
-        async with aiohttp.ClientSession(timeout=_TIMEOUT) as session:
-            async with session.post(url, json=payload) as resp:
-                if resp.status != 200:
-                    text = await resp.text()
-                    raise LLMCallError(f"ローカル LLM サーバーからエラーコード {resp.status} が返されました: {text}")
-                data = await resp.json()
+        async with _get_session(cfg).post(url, json=payload) as resp:
+            if resp.status != 200:
+                text = await resp.text()
+                raise LLMCallError(f"ローカル LLM サーバーからエラーコード {resp.status} が返されました: {text}")
+            data = await resp.json()
     except aiohttp.ClientError as e:
         raise LLMCallError(f"ローカル LLM サーバーへの接続に失敗しました: {e}") from e
     except Exception as e:  # pylint: disable=broad-except
         raise LLMCallError(f"ローカル LLM 応答の処理中にエラーが発生しました: {e}") from e
 
-    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-    if content == "":
+    choices = data.get("choices") or [{}]
+    contents = [choice.get("message", {}).get("content", "") for choice in choices[:n]]
+    if any(content == "" for content in contents):
         raise LLMCallError("ローカル LLM から空のレスポンスが返されました")
-    return content
+    return contents
+
+
+async def _call_local(prompt: str, cfg: Config) -> str:
+    """非同期でローカル LLM サーバーに問い合わせる"""
+    return (await _post_chat(prompt, cfg, 1))[0]
+
+
+async def _call_local_n(prompt: str, cfg: Config, n: int) -> List[str]:
+    """同じプロンプトへの応答を n 件まとめて取得する（``n`` パラメータで1リクエストに集約）
+
+    サーバーが ``n`` に対応せず返した応答が n 件に満たない場合は、不足分を個別に問い合わせる。
+    """
+    contents = await _post_chat(prompt, cfg, n)
+    while len(contents) < n:
+        contents.append(await _call_local(prompt, cfg))
+    return contents
+
+
+async def _call_local_once(prompt: str, cfg: Config) -> str:
+    """1回だけ問い合わせ、使用した ClientSession を閉じる"""
+    try:
+        return await _call_local(prompt, cfg)
+    finally:
+        await aclose()
 
 
 def generate(prompt: str, cfg: Config) -> str:
     """同期ヘルパー"""
-    return asyncio.run(_call_local(prompt, cfg))
\ No newline at end of file
+    return asyncio.run(_call_local_once(prompt, cfg))
\ No newline at end of file
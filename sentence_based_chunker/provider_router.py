@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Literal
+from typing import List, Literal
 
 from .config import Config
 from . import local_llm, remote_llm
@@ -14,6 +14,12 @@ class ProviderRouter:
     def __init__(self, cfg: Config):
         self.cfg = cfg
         self.mode: Literal["local", "remote", "auto"] = cfg.llm.provider
+        # Stage C で同時に発行する問い合わせ数の上限
+        self.concurrency: int = cfg.runtime.llm_concurrency
+        # ローカル LLM へ投票分の応答を1リクエストでまとめて要求するか
+        self.batch_votes: bool = (
+            self.mode != "remote" and cfg.llm.local is not None and cfg.llm.local.batch_votes
+        )
 
     async def call(self, prompt: str) -> str:
         if self.mode == "remote":
@@ -23,14 +29,24 @@ class ProviderRouter:
         # auto: デフォルトはローカル。
         return await _async_local(prompt, self.cfg)
 
+    async def call_n(self, prompt: str, n: int) -> List[str]:
+        """同じプロンプトへの応答を n 件返す（batch_votes 有効時は1リクエストに集約）"""
+        if self.batch_votes:
+            return await local_llm._call_local_n(prompt, self.cfg, n)
+        return [await self.call(prompt) for _ in range(n)]
+
+    async def aclose(self) -> None:
+        """問い合わせに使用した接続を閉じる"""
+        await local_llm.aclose()
+
 
 # ---- 内部 async ラッパ ------------------
 import asyncio
 
 
 async def _async_local(prompt: str, cfg: Config) -> str:
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, local_llm.generate, prompt, cfg)
+    # 実行中のイベントループ上で直接問い合わせ、ClientSession の接続を使い回す
+    return await local_llm._call_local(prompt, cfg)
 
 
 async def _async_remote(prompt: str, cfg: Config) -> str:
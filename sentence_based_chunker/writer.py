@@ -9,18 +9,28 @@ from typing import Iterable
 from .builder import Chunk
 from .exceptions import FileWriteError
 
+# orjson は任意依存。未導入の場合は標準の json で書き出す
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
 
 def write_chunks(path: pathlib.Path | str, chunks: Iterable[Chunk]):
     """チャンク結果をファイルに書き出す。
 
+    ``chunks`` はジェネレータでもよく、1チャンクずつ JSONL として追記する。
     書き込みに失敗した場合は ``FileWriteError`` を送出する。
     """
     path = pathlib.Path(path)
     try:
-        with path.open("w", encoding="utf-8") as f:
+        with path.open("wb") as f:
             for chunk in chunks:
-                record = {"text": chunk.text, "sentences": chunk.sentences}
-                json.dump(record, f, ensure_ascii=False)
-                f.write("\n")
+                f.write(_dumps(chunk.to_record()))
+                f.write(b"\n")
     except Exception as e:  # pylint: disable=broad-except
         raise FileWriteError(f"出力ファイルへの書き込みに失敗しました: {e}") from e
\ No newline at end of file
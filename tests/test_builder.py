@@ -1,3 +1,5 @@
+import dataclasses
+
 from sentence_based_chunker import builder
 
 
@@ -5,8 +7,24 @@ def test_build_chunks():
     sentences = ["A。", "B。", "C。"]
     boundaries = [False, True, False]
 
-    chunks = builder.build_chunks(sentences, boundaries, cfg=None)
+    chunks = list(builder.build_chunks(sentences, boundaries, cfg=None))
 
     assert len(chunks) == 2
     assert chunks[0].sentences == sentences[:2]
-    assert chunks[1].sentences == [sentences[2]]
\ No newline at end of file
+    assert chunks[1].sentences == [sentences[2]]
+
+
+def test_chunk_text():
+    chunk = builder.Chunk(sentences=["A。", "B。"])
+
+    assert chunk.text == "A。B。"
+    assert chunk.text is chunk.text
+    assert chunk == builder.Chunk(sentences=["A。", "B。"])
+    assert dataclasses.asdict(chunk) == {"sentences": ["A。", "B。"]}
+    assert builder.Chunk(**dataclasses.asdict(chunk)) == chunk
+
+
+def test_chunk_to_record():
+    chunk = builder.Chunk(sentences=["A。", "B。"])
+
+    assert chunk.to_record() == {"text": "A。B。", "sentences": ["A。", "B。"]}
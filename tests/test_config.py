@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+from sentence_based_chunker.config import load_config
+from sentence_based_chunker.exceptions import ConfigLoadError
+
+
+CONFIG_YAML = """\
+runtime:
+  device: "cpu"
+llm:
+  provider: "local"
+failover:
+  f1_drop_threshold: 0.03
+"""
+
+
+def test_load_config_returns_independent_copies(tmp_path):
+    conf = tmp_path / "conf.yaml"
+    conf.write_text(CONFIG_YAML, encoding="utf-8")
+
+    first = load_config(conf)
+    first.llm.provider = "remote"
+    second = load_config(conf)
+
+    assert second.llm.provider == "local"
+    assert second is not first
+
+
+def test_load_config_reloads_modified_file(tmp_path):
+    conf = tmp_path / "conf.yaml"
+    conf.write_text(CONFIG_YAML, encoding="utf-8")
+    assert load_config(conf).runtime.device == "cpu"
+
+    conf.write_text(CONFIG_YAML.replace('"cpu"', '"mps"'), encoding="utf-8")
+    stat = conf.stat()
+    os.utime(conf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert load_config(conf).runtime.device == "mps"
+
+
+def test_load_config_missing_file(tmp_path):
+    with pytest.raises(ConfigLoadError):
+        load_config(tmp_path / "missing.yaml")
+
+
+def test_load_config_rejects_unknown_precision(tmp_path):
+    conf = tmp_path / "conf.yaml"
+    conf.write_text(CONFIG_YAML.replace('device: "cpu"', 'device: "cpu"\n  precision: "fp8"'), encoding="utf-8")
+
+    with pytest.raises(ConfigLoadError):
+        load_config(conf)
+
+
+def test_load_config_json_and_toml(tmp_path):
+    json_conf = tmp_path / "conf.json"
+    json_conf.write_text(
+        '{"runtime": {"device": "cpu"}, "llm": {"provider": "local"}, '
+        '"failover": {"f1_drop_threshold": 0.03}}',
+        encoding="utf-8",
+    )
+    toml_conf = tmp_path / "conf.toml"
+    toml_conf.write_text(
+        '[runtime]\ndevice = "cpu"\n\n[llm]\nprovider = "local"\n\n'
+        '[failover]\nf1_drop_threshold = 0.03\n',
+        encoding="utf-8",
+    )
+
+    assert load_config(json_conf) == load_config(toml_conf)
+
+
+def test_load_config_invalid_toml(tmp_path):
+    conf = tmp_path / "conf.toml"
+    conf.write_text("[runtime\n", encoding="utf-8")
+
+    with pytest.raises(ConfigLoadError):
+        load_config(conf)
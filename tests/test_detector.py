@@ -1,3 +1,5 @@
+import asyncio
+
 import numpy as np
 
 from sentence_based_chunker import detector
@@ -26,4 +28,56 @@ def test_detect_boundaries_simple():
         np.array([0.0, 1.0]),
     ]
     flags = list(detector.detect_boundaries(emb, _dummy_cfg()))
-    assert flags == [False, False, True]
\ No newline at end of file
+    assert flags == [False, False, True]
+
+
+def test_detect_boundaries_matrix_input():
+    emb = np.array([
+        [1.0, 0.0],
+        [1.0, 0.0],
+        [0.0, 1.0],
+    ], dtype=np.float32)
+    flags = list(detector.detect_boundaries(emb, _dummy_cfg()))
+    assert flags == [False, False, True]
+
+
+class _FakeRouter:
+    """文に "yes" を含む候補のみ yes と答え、同時実行数を記録するルーター"""
+
+    def __init__(self, concurrency: int, batch_votes: bool = False):
+        self.concurrency = concurrency
+        self.batch_votes = batch_votes
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def call(self, prompt: str) -> str:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0)
+        self.active -= 1
+        self.calls += 1
+        return "yes" if "yes-topic" in prompt else "no"
+
+    async def call_n(self, prompt: str, n: int) -> list:
+        self.calls += 1
+        return ["yes" if "yes-topic" in prompt else "no"] * n
+
+
+def test_stage_c_votes_with_limited_concurrency():
+    sentences = ["a", "yes-topic", "b", "c", "yes-topic"]
+    prelim = [False, True, True, False, True]
+    router = _FakeRouter(concurrency=2)
+    refined = asyncio.run(detector._stage_c(sentences, prelim, router, n_vote=3))
+    assert refined == [False, True, False, False, True]
+    assert router.calls == 9
+    assert router.peak == 2
+
+
+def test_stage_c_batch_votes_one_request_per_candidate():
+    sentences = ["a", "yes-topic", "b", "c", "yes-topic"]
+    prelim = [False, True, True, False, True]
+    router = _FakeRouter(concurrency=2, batch_votes=True)
+    refined = asyncio.run(detector._stage_c(sentences, prelim, router, n_vote=3))
+    assert refined == [False, True, False, False, True]
+    assert router.calls == 3
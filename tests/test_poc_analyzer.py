@@ -0,0 +1,30 @@
+import importlib.util
+import pathlib
+
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("joblib")
+pytest.importorskip("threadpoolctl")
+
+
+POC_PATH = pathlib.Path(__file__).resolve().parents[1] / "docs" / "PoC実装_軽量AI文書解析システム.py"
+
+
+@pytest.fixture(scope="module")
+def poc():
+    spec = importlib.util.spec_from_file_location("poc_analyzer", POC_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"classifier_kind": "hgbt"}])
+def test_classifier_is_not_constant_on_demo_data(poc, kwargs):
+    texts, labels, boundaries = poc.create_demo_training_data()
+    analyzer = poc.LightweightDocumentAnalyzer(fit_cache_dir=None, **kwargs)
+    analyzer.train(texts, labels, boundaries)
+
+    predicted = {str(result.structure_type) for result, _ in analyzer.analyze_batch(texts)}
+
+    assert len(predicted) > 1
@@ -30,7 +30,7 @@ class TestSemanticDocumentParser:
         assert parser.config is not None
         assert isinstance(parser.config, DocumentStructureConfig)
         assert parser._current_section_stack == []
-        assert parser._current_list_stack == []
+        assert parser._current_list_map == {}
         assert parser._line_number == 0
         
         print("✓ パーサーの初期化テスト - 成功")